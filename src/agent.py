@@ -1,83 +1,70 @@
-import os
-from typing import Annotated, TypedDict
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
-from chatbot import State, chatbot
-from model import tools
-import logging
-from datetime import datetime
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, SystemMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from graph import build_agent, message_text
+from model import llm_with_tools, tools
+from answer_cache import default_answer_cache, final_answer
+from agent_tools.registry import registry
+from telemetry import TelemetryCallback, emit, start_tracing
+import time
+import uuid
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 import asyncio
 
-# 3. Define the Nodes
-builder = StateGraph(State)
+# Compile the graph; the checkpointer keeps each session's history by thread_id
+agent = build_agent(llm_with_tools, tools, checkpointer=InMemorySaver())
+answer_cache = default_answer_cache()
 
-# Add our nodes: the chatbot and the prebuilt ToolNode
-builder.add_node("chatbot", chatbot)
-builder.add_node("tools", ToolNode(tools))
+# --- SETUP TRACING ---
+# Node, model and tool spans go to agent_trace.jsonl from a background thread;
+# summarize them with `python telemetry.py agent_trace.jsonl`
+start_tracing('agent_trace.jsonl')
+telemetry = TelemetryCallback()
 
-# Set the flow: Start -> Chatbot
-builder.add_edge(START, "chatbot")
 
-# Conditional Edge: After the chatbot runs, should we call tools or end?
-builder.add_conditional_edges(
-    "chatbot",
-    tools_condition, # This checks if the LLM generated a tool call
-)
-
-# After tools run, always go back to the chatbot to process the results
-builder.add_edge("tools", "chatbot")
-
-# Compile the graph
-agent = builder.compile()
-
-# --- SETUP LOGGING ---
-logging.basicConfig(
-    filename='agent_reasoning.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s',
-    filemode='a' # 'a' for append, 'w' to overwrite each run
-)
+async def run_agent_with_logging(user_input: str, thread_id: str = None):
+    thread_id = thread_id or str(uuid.uuid4())
+    start = time.perf_counter()
 
+    inputs = {"messages": [("user", user_input)]}
+    config = {"configurable": {"thread_id": thread_id}, "callbacks": [telemetry]}
 
-def log_and_print(message):
-    """Helper to both print to console and write to the log file."""
-    print(message)
-    logging.info(message)
+    # 0. Opening questions answered before (or near-duplicates) skip the agent
+    state = await agent.aget_state(config)
+    first_turn = not state.values.get("messages")
+    if first_turn:
+        cached = await asyncio.to_thread(answer_cache.lookup, user_input)
+        if cached is not None:
+            print(cached)
+            await agent.aupdate_state(config, {"messages": [HumanMessage(user_input), AIMessage(cached)]},
+                                      as_node="chatbot")
+            emit("turn", "agent", session=thread_id, ms=round((time.perf_counter() - start) * 1000, 2), cached=True)
+            return
 
+    # 1. "messages" streams the chatbot's tokens as they arrive; "updates"
+    # reports each node once it finishes
+    async for mode, chunk in agent.astream(inputs, config, stream_mode=["messages", "updates"]):
+        if mode == "messages":
+            token, metadata = chunk
+            if metadata.get("langgraph_node") == "chatbot" and isinstance(token, AIMessageChunk):
+                print(message_text(token), end="", flush=True)
+            continue
 
-async def run_agent_with_logging(user_input: str):
-    log_and_print(f"\n{'='*20} NEW SESSION: {datetime.now()} {'='*20}")
-    log_and_print(f"USER INPUT: {user_input}")
-    
-    inputs = {"messages": [("user", user_input)]}
-    
-    # 1. We use 'async for' to handle the async generator from astream
-    async for chunk in agent.astream(inputs, stream_mode="updates"):
-        for node_name, data in chunk.items():
-            log_and_print(f"\n>>> NODE TRANSITION: Entering [{node_name}]")
-            
-            messages = data.get("messages", [])
-            for msg in messages:
-                # 1. Capture Agent Reasoning
-                if isinstance(msg, AIMessage) and msg.content:
-                    log_and_print(f"[REASONING]: {msg.content}")
-                
-                # 2. Capture Tool Calls
-                if hasattr(msg, "tool_calls") and msg.tool_calls:
-                    for tc in msg.tool_calls:
-                        log_and_print(f"[ACTION]: Calling Tool '{tc['name']}' with args: {tc['args']}")
-                
-                # 3. Capture Tool Outputs
-                if isinstance(msg, ToolMessage):
-                    raw_content = msg.content
-                    display_content = (raw_content[:200] + '...') if len(raw_content) > 200 else raw_content
-                    log_and_print(f"[TOOL RESULT]: {display_content}")
+        # 2. Show tool calls as they are made; timings and results are in the trace
+        for data in chunk.values():
+            for msg in (data or {}).get("messages", []):
+                for tc in getattr(msg, "tool_calls", None) or []:
+                    print(f"\n[ACTION]: Calling Tool '{tc['name']}' with args: {tc['args']}")
 
-    log_and_print(f"\n{'='*20} SESSION ENDED {'='*20}\n")
+    print()
+    emit("turn", "agent", session=thread_id, ms=round((time.perf_counter() - start) * 1000, 2), cached=False)
+    if first_turn:
+        # Cache the final reply only, not the narration streamed before tool calls
+        answer = await final_answer(agent, thread_id)
+        if answer is not None:
+            await asyncio.to_thread(answer_cache.store, user_input, answer)
+            answer_cache.save()
 
 
 if __name__ == "__main__":
-    asyncio.run(run_agent_with_logging("What is the ideal team for Jedi Master Mace Windu?"))
\ No newline at end of file
+    # Load tables, indexes and the vector store while the first question is sent
+    registry.warm_up()
+    asyncio.run(run_agent_with_logging("What is the ideal team for Jedi Master Mace Windu?"))
@@ -1,2 +1,5 @@
-from .character_data import find_character, get_character_data, list_all_characters
-from .rag_tool import find_relevant_units
\ No newline at end of file
+from .character_data import (find_character, get_character_data, get_character_payloads, get_characters_data,
+                             list_all_characters)
+from .rag_tool import find_relevant_units
+from .roster_query import query_roster
+from .team_synergy import suggest_team
@@ -1,13 +1,98 @@
-import pandas as pd
 import json
-from langchain.tools import tool
-import os
-import asyncio
+from langchain_core.tools import tool
+from .name_index import NameIndex
+from .registry import registry
 
-# Load your dataframes once at the start
-data_path = os.path.join(os.path.dirname(__file__), "../../data")
-df_all = pd.read_parquet(os.path.join(data_path, "swgoh_units.parquet"))
-df_details = pd.read_parquet(os.path.join(data_path, "character_details.parquet"))
+
+def normalize_url(character_url: str) -> str:
+    """Lookup key for a unit URL: case-insensitive, ignoring surrounding whitespace and trailing slashes."""
+    return character_url.strip().rstrip('/').lower()
+
+
+def build_payload_index(details, abilities_by_url) -> dict:
+    """
+    Serializes every unit's details and abilities to JSON once, keyed by
+    `normalize_url`, so that tool calls are a dictionary lookup.
+    """
+    index = {}
+    for data_dict in details.to_pylist():
+        data_dict['base_stats'] = {k: v for k, v in data_dict['base_stats'].items() if v is not None}
+        data_dict['abilities'] = abilities_by_url.get(data_dict['character_url'], [])
+        index[normalize_url(data_dict['character_url'])] = json.dumps(data_dict)
+    return index
+
+
+def build_compact_index(details, abilities_by_url, units) -> dict:
+    """
+    Like `build_payload_index`, but with compact records for batched lookups:
+    name and tags are folded in, the player data and ability breakdown links
+    are dropped, placeholder and empty ability descriptions are left out, and
+    ability flags are collapsed into a `flags` list that is only present when
+    one is set.
+    """
+    units_by_url = {normalize_url(u['character_url']): u for u in units[['name', 'character_url', 'tags']].to_dict(orient='records')}
+    index = {}
+    for data_dict in details.to_pylist():
+        key = normalize_url(data_dict['character_url'])
+        unit = units_by_url.get(key, {})
+        abilities = []
+        for ability in abilities_by_url.get(data_dict['character_url'], []):
+            flags = [flag for flag in ('zeta', 'omicron', 'ultimate') if ability[f'is_{flag}']]
+            compact_ability = {'name': ability['ability_name'], 'type': ability['ability_type']}
+            if ability['description'] and ability['description'] != "Placeholder":
+                compact_ability['description'] = ability['description']
+            if flags:
+                compact_ability['flags'] = flags
+            abilities.append(compact_ability)
+        record = {
+            'name': unit.get('name'),
+            'character_url': data_dict['character_url'],
+            'tags': list(unit.get('tags', [])),
+            'base_stats': {k: v for k, v in data_dict['base_stats'].items() if v is not None},
+            'ability_classes': data_dict['ability_classes'],
+            'mods_data_url': data_dict['mods_data_url'],
+            'abilities': abilities,
+        }
+        index[key] = json.dumps(record, separators=(',', ':'))
+    return index
+
+
+def build_name_index(units) -> NameIndex:
+    """Fuzzy name and nickname index over the roster."""
+    return NameIndex(units['name'], units['character_url'])
+
+
+# Indexes are built from the shared tables on first use
+@registry.artifact("payload_index")
+def load_payload_index(registry):
+    return build_payload_index(registry.get("details"), registry.get("abilities_by_url"))
+
+
+@registry.artifact("compact_index")
+def load_compact_index(registry):
+    return build_compact_index(registry.get("details"), registry.get("abilities_by_url"), registry.get("units"))
+
+
+@registry.artifact("name_index")
+def load_name_index(registry):
+    return build_name_index(registry.get("units"))
+
+
+def resolve_character(reference: str):
+    """
+    Resolves a unit URL or name to its normalized URL: exact URL first, then a
+    confident match from the name index (names, nicknames, typos). Returns
+    `(key, candidates)`. Without a confident match, `key` is None and
+    `candidates` lists the units the reference could mean, as
+    `{name, character_url}` dicts (empty if nothing matches).
+    """
+    key = normalize_url(reference)
+    if key in registry.get("payload_index"):
+        return key, []
+    url, candidates = registry.get("name_index").resolve(reference)
+    if url is not None:
+        return normalize_url(url), []
+    return None, [{'name': name, 'character_url': url} for name, url, _ in candidates]
 
 
 @tool
@@ -15,6 +100,7 @@ def list_all_characters() -> list:
     """
     Returns a list of all characters in the dataset including their names and tags.
     """
+    df_all = registry.get("units")
     return df_all[['name', 'tags']].to_dict(orient='records')
 
 
@@ -23,34 +109,72 @@ def find_character(character_name: str) -> str:
     """
     Search for a character by name and return their unique URL.
     Use this when the user mentions a character but you don't have their URL yet.
+    Accepts partial names, common nicknames (e.g. "JMK", "SLKR") and typos, and
+    returns up to 5 ranked matches with their URLs and match scores (1.0 is exact).
     """
-    # Simple case-insensitive match
-    match = df_all[df_all['name'].str.contains(character_name, case=False, na=False)]
-    
-    if not match.empty:
-        # Return the first match found
-        return match.iloc[0]['character_url']
-    else:
+    matches = registry.get("name_index").search(character_name)
+    if not matches:
         return f"Character '{character_name}' not found."
+    return json.dumps([{'name': name, 'character_url': url, 'score': score} for name, url, score in matches],
+                      separators=(',', ':'))
 
 
 @tool
-async def get_character_data(character_url: str) -> str:
+def get_character_data(character_url: str) -> str:
     """
     Retrieves the full row of data (stats, abilities, tags, and links) for a 
-    character using their specific URL. URL must be exact.
-    """
-    # Search the details table using the URL as the key
-    def fetch():
-        match = df_details[df_details['character_url'] == character_url]
-        
-        if not match.empty:
-            # Convert the row to a dictionary and then to JSON for the LLM
-            data_dict = match.iloc[0].to_dict()
-            
-            # Parquet stores lists/dicts natively; ensure they are serializable
-            return json.dumps(data_dict, default=str)
+    character using their specific URL, as returned by the other tools. A
+    character name also works; a name that could mean several characters
+    returns their candidates instead, so ask the user which one they meant.
+    """
+    key, candidates = resolve_character(character_url)
+    if candidates:
+        return json.dumps({'query': character_url, 'error': 'ambiguous', 'candidates': candidates},
+                          separators=(',', ':'))
+    if key is None:
+        return "No detailed data found for this character."
+    # Payloads are serialized at load time, so this is a single dict lookup
+    return registry.get("payload_index")[key]
+
+
+def _bulk_records(references, index) -> str:
+    """
+    JSON array with the preserialized record from `index` for each unit URL or
+    name in `references`, in order; unknown or ambiguous references get an
+    error entry. Records are spliced in as-is rather than decoded and re-encoded.
+    """
+    records = []
+    for reference in references:
+        key, candidates = resolve_character(reference)
+        if candidates:
+            records.append(json.dumps({'query': reference, 'error': 'ambiguous', 'candidates': candidates},
+                                      separators=(',', ':')))
+        elif key is None or key not in index:
+            records.append(json.dumps({'query': reference, 'error': 'not found'}, separators=(',', ':')))
         else:
-            return "No detailed data found for this URL."
-    
-    return await asyncio.to_thread(fetch)
\ No newline at end of file
+            records.append(index[key])
+    return "[" + ",".join(records) + "]"
+
+
+def get_character_payloads(characters: list) -> str:
+    """
+    Bulk variant of `get_character_data`: the full preserialized payloads of
+    many units in one call, as a JSON array in request order.
+    """
+    return _bulk_records(characters, registry.get("payload_index"))
+
+
+@tool
+def get_characters_data(characters: list[str], full: bool = False) -> str:
+    """
+    Retrieves compact stats, tags, ability classes and abilities for SEVERAL
+    characters in one call. Each entry may be a character URL or a character
+    name. Prefer this over repeated get_character_data calls when comparing
+    characters or building a team. Set `full` to get the complete records,
+    with every ability flag and link, instead. A name that could mean several
+    characters comes back with their candidates instead; ask the user which
+    one they meant.
+    """
+    if full:
+        return get_character_payloads(characters)
+    return _bulk_records(characters, registry.get("compact_index"))
@@ -0,0 +1,84 @@
+import re
+import zlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+DEFAULT_MODELS = {
+    "google": "gemini-embedding-001",
+    "sentence-transformers": "all-MiniLM-L6-v2",
+    "hashing": "hashing-768",
+}
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic, dependency-free embeddings for offline builds and tests.
+    Word unigrams and bigrams are hashed (CRC32) into `dim` signed buckets and
+    the result is L2-normalized, so texts sharing words land close together.
+    Not semantic, but stable across processes and machines.
+    """
+
+    def __init__(self, dim=768):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+
+    def _features(self, text):
+        tokens = TOKEN_RE.findall(text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed_documents(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array([zlib.crc32(f.encode('utf-8')) for f in self._features(text)], dtype=np.uint32)
+            if len(hashes):
+                signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+                np.add.at(matrix[row], hashes % self.dim, signs)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return (matrix / np.where(norms == 0, 1, norms)).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    Local CPU (or GPU) embeddings from a sentence-transformers model, encoded
+    in batches of `batch_size`. Needs the optional `sentence-transformers`
+    package; the model is downloaded once and cached by that library.
+    """
+
+    def __init__(self, model="all-MiniLM-L6-v2", batch_size=64, device=None):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("SentenceTransformerEmbeddings needs `pip install sentence-transformers`") from e
+        self.model = model
+        self.batch_size = batch_size
+        self._encoder = SentenceTransformer(model, device=device)
+
+    def embed_documents(self, texts):
+        vectors = self._encoder.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True)
+        return vectors.tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def create_embeddings(provider="google", model=None):
+    """
+    Builds the embedding model for `provider`: "google" (Gemini API),
+    "sentence-transformers" (local model) or "hashing" (`HashingEmbeddings`,
+    where `model` may be "hashing-<dim>"). Every returned object has a
+    `model` attribute naming the model, used to namespace caches.
+    """
+    model = model or DEFAULT_MODELS.get(provider)
+    if provider == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        return GoogleGenerativeAIEmbeddings(model=model)
+    if provider == "sentence-transformers":
+        return SentenceTransformerEmbeddings(model)
+    if provider == "hashing":
+        return HashingEmbeddings(int(model.rsplit("-", 1)[-1]))
+    raise ValueError(f"Unknown embedding provider '{provider}'; expected one of {sorted(DEFAULT_MODELS)}")
@@ -0,0 +1,115 @@
+import math
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that carry no meaning once the tags in a query have been recognised,
+# e.g. "list all Jedi characters with Omicrons"
+STOPWORDS = {
+    'a', 'all', 'an', 'and', 'any', 'are', 'best', 'character', 'characters', 'for', 'give', 'has', 'have',
+    'in', 'is', 'list', 'me', 'of', 'on', 'or', 'show', 'that', 'the', 'toon', 'toons', 'unit', 'units',
+    'what', 'which', 'who', 'with',
+}
+
+# Ability flags recognised in queries, mapped to their metadata key
+FLAG_WORDS = {'zeta': 'has_zeta', 'omicron': 'has_omicron', 'ultimate': 'has_ultimate'}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def _term_pattern(term):
+    # Whole words only, with an optional plural "s" ("leaders" -> "Leader")
+    return re.compile(r"(?<![a-z0-9])" + re.escape(term.lower()) + r"s?(?![a-z0-9])")
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuses ranked lists of IDs: each ID scores the sum of 1 / (k + rank) over the lists it appears in."""
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridIndex:
+    """
+    In-process keyword side of `find_relevant_units`, built from the documents
+    and metadata already stored in the vector store.
+
+    Metadata keys `tag:<name>` and `class:<name>` and the `has_zeta`,
+    `has_omicron` and `has_ultimate` flags form a filter vocabulary; queries
+    are scanned for those terms to narrow the candidate set. Whatever text is
+    left is ranked with Okapi BM25 over the document text. `version`
+    identifies the indexed content, for cache keys.
+    """
+
+    def __init__(self, ids, texts, metadatas, k1=1.5, b=0.75, version=""):
+        self.version = version
+        self.ids = list(ids)
+        self.texts = dict(zip(self.ids, texts))
+        self.metadatas = dict(zip(self.ids, metadatas))
+        self.k1 = k1
+        self.b = b
+
+        # Filter vocabulary: lower-cased tag or ability class -> matching IDs
+        self.terms = {}
+        for doc_id, metadata in self.metadatas.items():
+            for key, value in metadata.items():
+                if value is True and key.startswith(('tag:', 'class:')):
+                    self.terms.setdefault(key.split(':', 1)[1].lower(), set()).add(doc_id)
+        # Longest first, so "Galactic Republic" wins over "Republic"
+        self._patterns = [(term, _term_pattern(term)) for term in sorted(self.terms, key=len, reverse=True)]
+        self._flag_patterns = [(key, _term_pattern(word)) for word, key in FLAG_WORDS.items()]
+
+        self._term_freqs = {doc_id: Counter(tokenize(text)) for doc_id, text in self.texts.items()}
+        self._lengths = {doc_id: sum(tf.values()) for doc_id, tf in self._term_freqs.items()}
+        self._avg_length = sum(self._lengths.values()) / max(len(self._lengths), 1)
+        doc_freqs = Counter(token for tf in self._term_freqs.values() for token in tf)
+        n = len(self.ids)
+        self._idf = {token: math.log(1 + (n - df + 0.5) / (df + 0.5)) for token, df in doc_freqs.items()}
+
+    def parse_query(self, query):
+        """
+        Splits a query into filters and leftover text. Returns `(filters, residual)`
+        where `filters` is a list of vocabulary terms and flag keys, and
+        `residual` holds the remaining non-stopword tokens.
+        """
+        text = query.lower()
+        filters = []
+        for term, pattern in self._patterns + self._flag_patterns:
+            if pattern.search(text):
+                filters.append(term)
+                text = pattern.sub(" ", text)
+        residual = [token for token in tokenize(text) if token not in STOPWORDS]
+        return filters, residual
+
+    def filter(self, filters):
+        """IDs matching every filter, in index order; all IDs if there are no filters."""
+        matches = set(self.ids)
+        for term in filters:
+            if term in self.terms:
+                matches &= self.terms[term]
+            else:
+                matches &= {doc_id for doc_id in matches if self.metadatas[doc_id].get(term)}
+        return [doc_id for doc_id in self.ids if doc_id in matches]
+
+    def rank(self, query, candidates=None):
+        """
+        BM25 ranking of `candidates` (default: every document) against `query`.
+        Documents that match no query token keep their relative order at the end.
+        """
+        candidates = self.ids if candidates is None else candidates
+        tokens = [token for token in tokenize(query) if token in self._idf]
+        if not tokens:
+            return list(candidates)
+
+        def score(doc_id):
+            tf = self._term_freqs[doc_id]
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / self._avg_length)
+            return sum(self._idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm) for t in tokens if t in tf)
+
+        scores = {doc_id: score(doc_id) for doc_id in candidates}
+        return sorted(candidates, key=lambda doc_id: -scores[doc_id])
@@ -0,0 +1,162 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+# Community nicknames that initials alone don't produce, or that initials
+# would give to the wrong unit. Entries whose unit isn't in the roster are skipped.
+ALIASES = {
+    "jkl": "Jedi Knight Luke Skywalker",
+    "jml": "Jedi Master Luke Skywalker",
+    "gas": "General Skywalker",
+    "lv": "Lord Vader",
+    "dr": "Darth Revan",
+    "kru": "Kylo Ren (Unmasked)",
+    "emp": "Emperor Palpatine",
+    "palp": "Emperor Palpatine",
+    "hyoda": "Hermit Yoda",
+    "mj": "Mara Jade, The Emperor's Hand",
+    "gl leia": "Leia Organa",
+    "gl rey": "Rey",
+    "bam": "Boba Fett, Scion of Jango",
+    "snips": "Ahsoka Tano (Snips)",
+    "fulcrum": "Ahsoka Tano (Fulcrum)",
+    "old ben": "Obi-Wan Kenobi (Old Ben)",
+    "mando": "The Mandalorian",
+    "beskar mando": "The Mandalorian (Beskar Armor)",
+    "ipd": "Imperial Probe Droid",
+    "sls": "Stormtrooper Luke",
+}
+EXACT, ALIAS, INITIALS, PREFIX, TOKENS, SUBSTRING = 1.0, 0.97, 0.95, 0.9, 0.85, 0.75
+FUZZY_WEIGHT = 0.85
+# Only the names sharing the most trigrams with the query get the costlier fuzzy scoring
+FUZZY_CANDIDATES = 10
+# resolve() only picks a unit on its own if it scores at least RESOLVE_MIN_SCORE and
+# beats every other name by RESOLVE_MARGIN: "yoda" (prefix of "Yoda & Chewie",
+# word of "Hermit Yoda") or "gg" (initials of two units) are left to the user
+RESOLVE_MIN_SCORE = 0.7
+RESOLVE_MARGIN = 0.1
+
+
+def normalize_name(text):
+    """'Chirrut Îmwe' -> 'chirrut imwe'; 'CT-7567 "Rex"' -> 'ct 7567 rex'"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    """Dice coefficient of two trigram sets."""
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def word_similarity(a, b):
+    """Edit similarity of two words (0 to 1); tolerates transpositions that trigrams miss."""
+    if a[0] != b[0] and a[-1] != b[-1] or abs(len(a) - len(b)) > 2:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class NameIndex:
+    """
+    Resolves unit names, nicknames and misspellings to units, built once from
+    the roster. Matches are scored in tiers: exact name (ignoring case,
+    accents and punctuation), alias (`ALIASES`, plus each name's initials such
+    as "jmk" or "slkr" and its unspaced form such as "bb8"), name prefix,
+    every query word starting a name word ("mace"), substring, and finally
+    trigram similarity for typos ("kenbi"). Within a tier, shorter names win.
+    """
+
+    def __init__(self, names, urls, aliases=ALIASES):
+        self.names = list(names)
+        self.urls = list(urls)
+        self.normalized = [normalize_name(n) for n in self.names]
+        self.tokens = [n.split() for n in self.normalized]
+        self.exact = defaultdict(list)
+        self.aliases = defaultdict(list)
+        self.postings = defaultdict(set)
+        self.grams = []
+        for i, (name, tokens) in enumerate(zip(self.normalized, self.tokens)):
+            self.exact[name].append(i)
+            self.exact[name.replace(" ", "")].append(i)
+            if len(tokens) > 1:
+                self.aliases[("initials", "".join(t[0] for t in tokens))].append(i)
+            grams = trigrams(name)
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings[gram].add(i)
+        by_name = {name: i for i, name in enumerate(self.names)}
+        for alias, name in aliases.items():
+            if name in by_name:
+                self.aliases[("alias", normalize_name(alias))].append(by_name[name])
+
+    def _scores(self, query):
+        scores = {}
+
+        def offer(i, score):
+            if score > scores.get(i, 0):
+                scores[i] = score
+
+        for i in self.exact.get(query, ()):
+            offer(i, EXACT)
+        for i in self.aliases.get(("alias", query), ()):
+            offer(i, ALIAS)
+        for i in self.aliases.get(("initials", query), ()):
+            offer(i, INITIALS)
+
+        query_tokens = query.split()
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+        fuzzy = []
+        for i in shared:
+            name = self.normalized[i]
+            if name.startswith(query):
+                offer(i, PREFIX)
+            elif all(any(t.startswith(q) for t in self.tokens[i]) for q in query_tokens):
+                offer(i, TOKENS)
+            elif query in name:
+                offer(i, SUBSTRING)
+            else:
+                fuzzy.append(i)
+
+        # Typos: similarity of the whole name, or of each query word to its closest name word.
+        # Skipped when the query already matched names outright
+        if scores and max(scores.values()) >= TOKENS:
+            return scores
+        for i in sorted(fuzzy, key=shared.__getitem__, reverse=True)[:FUZZY_CANDIDATES]:
+            words = sum(max(word_similarity(q, t) for t in self.tokens[i]) for q in query_tokens)
+            offer(i, FUZZY_WEIGHT * max(dice(query_grams, self.grams[i]), words / len(query_tokens)))
+        return scores
+
+    def search(self, query, limit=5, min_score=0.5):
+        """Returns up to `limit` `(name, url, score)` matches for `query`, best first."""
+        query = normalize_name(query)
+        if not query:
+            return []
+        scores = self._scores(query)
+        ranked = sorted((i for i, s in scores.items() if s >= min_score),
+                        key=lambda i: (-scores[i], len(self.normalized[i]), self.normalized[i]))
+        return [(self.names[i], self.urls[i], round(scores[i], 3)) for i in ranked[:limit]]
+
+    def resolve(self, query, min_score=RESOLVE_MIN_SCORE, margin=RESOLVE_MARGIN):
+        """
+        Returns `(url, candidates)`. `url` is the match for `query` if it is a
+        confident one, scoring at least `min_score` and ahead of every other
+        name by `margin`; otherwise it is None and `candidates` holds the
+        `(name, url, score)` matches close to the best, to ask which one was
+        meant (empty if nothing matches at all).
+        """
+        matches = self.search(query)
+        if not matches:
+            return None, []
+        best = matches[0][2]
+        # Scores are rounded to 3 places, so compare the gap at that precision
+        if best >= min_score and (len(matches) == 1 or round(best - matches[1][2], 3) >= margin):
+            return matches[0][1], []
+        return None, [m for m in matches if round(best - m[2], 3) < margin]
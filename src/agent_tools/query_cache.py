@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+from .trace import emit
+
+
+def trace_cache(name, hit):
+    """Records a cache hit or miss in the agent's trace when tracing is on."""
+    emit("cache", name, hit=hit)
+
+
+def normalize_query(query):
+    """Cache key for a query: case-insensitive, with whitespace collapsed and surrounding punctuation dropped."""
+    return re.sub(r"\s+", " ", query.lower()).strip(" \t\n.,;:!?\"'")
+
+
+class LRUCache:
+    """
+    Thread-safe, bounded LRU cache whose entries expire `ttl` seconds after
+    they were stored (never, if `ttl` is None). Hits and misses are counted.
+
+    With a `path`, entries are loaded from a JSON file at start-up and
+    written back by `save()`. Keys must be strings and values JSON-serializable.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                # Stored oldest first, so insertion order is LRU order again
+                for key, value, stored_at in json.load(f):
+                    self._entries[key] = (value, stored_at)
+            self._evict(time.time())
+
+    def _evict(self, now):
+        if self.ttl is not None:
+            for key in [k for k, (_, stored_at) in self._entries.items() if now - stored_at > self.ttl]:
+                del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            now = time.time()
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            self._evict(now)
+
+    def items(self):
+        """Snapshot of the unexpired `(key, value)` pairs, least recently used first. Not counted as hits."""
+        with self._lock:
+            self._evict(time.time())
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            self._evict(time.time())
+            snapshot = [[key, value, stored_at] for key, (value, stored_at) in self._entries.items()]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """
+    Wraps an embedding model so that query embeddings are served from an
+    `LRUCache` keyed by `namespace` and the normalized query. Document
+    embeddings pass straight through to the wrapped model.
+    """
+
+    def __init__(self, embeddings, cache, namespace=""):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.namespace = namespace
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = f"{self.namespace}:{normalize_query(text)}"
+        vector = self.cache.get(key)
+        trace_cache("query_embedding", vector is not None)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(key, list(vector))
+        return vector
@@ -1,46 +1,83 @@
-from langchain.tools import tool
+from langchain_core.tools import tool
 from langchain_core.documents import Document
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain_chroma import Chroma
-from langchain_classic.storage import LocalFileStore
-from langchain_classic.embeddings import CacheBackedEmbeddings
-import tqdm
 from dotenv import load_dotenv
+import atexit
+import hashlib
+import json
 import os
-import pandas as pd
+import re
+from .hybrid_search import HybridIndex, reciprocal_rank_fusion
+from .query_cache import LRUCache, QueryCachedEmbeddings, normalize_query, trace_cache
+from .registry import registry
+from .summarizer import SUMMARY_PROMPT, AbilitySummarizer, SummaryCache
 
 load_dotenv(os.path.join(os.path.dirname(__file__), "../../.env"))
-data_path = os.path.join(os.path.dirname(__file__), "../../data")
-
-# 1. Load your source data
-df_all = pd.read_parquet(os.path.join(data_path, "swgoh_units.parquet"))
-df_details = pd.read_parquet(os.path.join(data_path, "character_details.parquet"))
-
-# Set up embeddings and cache
-store = LocalFileStore(os.path.join(data_path, "embedding_cache"))
-embeddings = GoogleGenerativeAIEmbeddings(model="gemini-embedding-001")
-# The 'namespace' ensures different models don't mix up their vectors
-cached_embedder = CacheBackedEmbeddings.from_bytes_store(
-    embeddings, 
-    store,
-    namespace=embeddings.model,
-    key_encoder="sha256"
-)
-
-# Initialize summarizer model
-summarizer_llm = ChatGoogleGenerativeAI(model="gemini-3-flash-preview", temperature=0)
-
-def summarize_ability(description: str) -> str:
-    """Uses Gemini 3 Flash to provide a concise summary of an ability description."""
-    if not description:
-        return ""
-    prompt = f"Summarize the following SWGOH character ability description in one to three concise sentences, focusing on the core mechanics and effects. Limit your response to only the summary of the ability, given only the information shown. Make it high level and as snappy as possible. Omit exact quantities to keep things brief. Keep the format simple, no titles or bullet points, just provide the summary:\n\n{description}"
-    try:
-        response = summarizer_llm.invoke(prompt)
-        return response.content[0]['text']
-    except Exception as e:
-        print(f"Error summarizing ability: {e}")
-        return description  # Fallback to original description if error
+# "chroma" (default) or "numpy" for the in-process NumpyVectorStore
+VECTOR_BACKEND = os.environ.get("SWGOH_VECTOR_BACKEND", "chroma").lower()
+# Number of IVF clusters for the numpy backend; unset means exact search
+ANN_LISTS = int(os.environ["SWGOH_ANN_LISTS"]) if os.environ.get("SWGOH_ANN_LISTS") else None
+# "google" (default), "sentence-transformers" or "hashing"; see embeddings.create_embeddings
+EMBEDDING_PROVIDER = os.environ.get("SWGOH_EMBEDDINGS", "google").lower()
+EMBEDDING_MODEL = os.environ.get("SWGOH_EMBEDDING_MODEL") or None
+# Vectors from different models can't share a store, so non-default providers get their own
+_store_suffix = "" if EMBEDDING_PROVIDER == "google" and EMBEDDING_MODEL is None else \
+    "-" + re.sub(r"[^a-z0-9]+", "-", f"{EMBEDDING_PROVIDER} {EMBEDDING_MODEL or ''}".lower()).strip("-")
+vectordb_path = registry.path(("swgoh_vectors" if VECTOR_BACKEND == "numpy" else "swgoh_vectordb") + _store_suffix)
+manifest_path = os.path.join(vectordb_path, "index_manifest.json")
+# Bump when the document text or metadata layout changes, so every unit is re-indexed
+DOCUMENT_VERSION = 2
+SUMMARY_MODEL = "gemini-3-flash-preview"
+ALIGNMENTS = ("Light Side", "Dark Side", "Neutral")
+
+
+# The model clients and Chroma are only imported when first needed; they
+# dominate import time otherwise
+@registry.artifact("embedder")
+def load_embedder(registry):
+    from langchain_classic.storage import LocalFileStore
+    from langchain_classic.embeddings import CacheBackedEmbeddings
+    from .embeddings import create_embeddings
+
+    # Set up embeddings and cache
+    store = LocalFileStore(registry.path("embedding_cache"))
+    embeddings = create_embeddings(EMBEDDING_PROVIDER, EMBEDDING_MODEL)
+    # The 'namespace' ensures different models don't mix up their vectors
+    cached_embedder = CacheBackedEmbeddings.from_bytes_store(
+        embeddings, 
+        store,
+        namespace=embeddings.model,
+        key_encoder="sha256"
+    )
+    # CacheBackedEmbeddings only caches documents; queries go through an LRU
+    return QueryCachedEmbeddings(cached_embedder, registry.get("query_embedding_cache"), namespace=embeddings.model)
+
+
+def _persistent_cache(path, max_entries, ttl):
+    cache = LRUCache(max_entries=max_entries, ttl=ttl, path=path)
+    atexit.register(cache.save)
+    return cache
+
+
+@registry.artifact("query_embedding_cache")
+def load_query_embedding_cache(registry):
+    return _persistent_cache(registry.path("query_cache/embeddings.json"), max_entries=512, ttl=30 * 24 * 3600)
+
+
+@registry.artifact("result_cache")
+def load_result_cache(registry):
+    # Keys include the index version, so entries never outlive the index they came from
+    return _persistent_cache(registry.path("query_cache/results.json"), max_entries=1024, ttl=24 * 3600)
+
+
+@registry.artifact("summarizer_llm")
+def load_summarizer_llm(registry):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=SUMMARY_MODEL, temperature=0)
+
+
+@registry.artifact("summarizer")
+def load_summarizer(registry):
+    return AbilitySummarizer(registry.get("summarizer_llm"), SummaryCache(registry.path("summary_cache.json")))
 
 
 def format_list(list_to_format: list) -> str:
@@ -51,9 +88,9 @@ def format_list(list_to_format: list) -> str:
     return list_str
 
 
-def process_character(character_row: pd.Series, character_details: pd.Series) -> Document:
+def process_character(character_row: dict, character_details: dict, abilities: list, summaries: dict) -> Document:
     abilities_text_list = []
-    for ability in character_details['abilities']:
+    for ability in abilities:
         if ability['description'] == "Placeholder":
             continue
         if ability['is_zeta'] and ability['is_omicron']:
@@ -67,8 +104,8 @@ def process_character(character_row: pd.Series, character_details: pd.Series) ->
         else:
             ability_material = ''
         
-        # Summarize the ability description
-        summary = summarize_ability(ability['description'])
+        # Summaries are produced up front for the whole roster
+        summary = summaries.get(ability['description'], ability['description'])
         ability_text = f"{ability['ability_name']} ({ability['ability_type']}){ability_material}: {summary}"
         abilities_text_list.append(ability_text)
         
@@ -78,42 +115,213 @@ def process_character(character_row: pd.Series, character_details: pd.Series) ->
     
     content = f"Character: {character_row['name']}\nTags: {tags}\nAbility Classes: {ability_classes_str}\nAbilities:\n{abilities_combined}"
     
-    # We keep the URL in metadata for the second 'Tool' step later
-    doc = Document(page_content=content, metadata={"url": character_row['character_url']})
+    # We keep the URL in metadata for the second 'Tool' step later, along with
+    # filterable flags for tags, ability classes and upgrade materials
+    metadata = {
+        "url": character_row['character_url'],
+        "name": character_row['name'],
+        "alignment": next((t for t in character_row['tags'] if t in ALIGNMENTS), ""),
+        "has_zeta": any(a['is_zeta'] for a in abilities),
+        "has_omicron": any(a['is_omicron'] for a in abilities),
+        "has_ultimate": any(a['is_ultimate'] for a in abilities),
+    }
+    metadata.update({f"tag:{t}": True for t in character_row['tags']})
+    metadata.update({f"class:{c}": True for c in character_details['ability_classes']})
+    doc = Document(page_content=content, metadata=metadata)
     return doc
 
 
-# Check if vector store already exists
-vectordb_path = os.path.join(data_path, "swgoh_vectordb")
+def build_documents(registry, urls=None) -> tuple:
+    """
+    Summarizes every unit (or only those in `urls`) into a Document for the
+    vector store. Returns `(documents, incomplete)`, where `incomplete` holds
+    the URLs of units with an ability the summarizer failed on; their
+    documents use the original description instead.
+    """
+    import tqdm
+
+    rows = registry.get("units").to_dict(orient='records')
+    if urls is not None:
+        urls = set(urls)
+        rows = [row for row in rows if row['character_url'] in urls]
+    details_by_url = {d['character_url']: d for d in registry.get("details").to_pylist()}
+    abilities_by_url = registry.get("abilities_by_url")
 
-if os.path.exists(vectordb_path) and os.listdir(vectordb_path):
-    # Load existing vector store
-    print("Loading existing vector store...")
-    vectorstore = Chroma(
-        persist_directory=vectordb_path,
-        embedding_function=cached_embedder
+    # Summarize every distinct description in one concurrent, cached batch
+    print(f"Processing {len(rows)} characters and summarizing abilities...")
+    summaries = registry.get("summarizer").summarize_all(
+        ability['description'] for row in rows for ability in abilities_by_url.get(row['character_url'], [])
+        if ability['description'] != "Placeholder"
     )
-else:
-    # Create new vector store (first time only)
-    print("Creating new vector store...")
 
     # Transform rows into "Documents"
     documents = []
-    print(f"Processing {len(df_all)} characters and summarizing abilities...")
-    for _, row in tqdm.tqdm(df_all.iterrows(), total=len(df_all)):
+    incomplete = set()
+    for row in tqdm.tqdm(rows, total=len(rows)):
         # We combine key fields into a text block for the model to "read"
-        character_details = df_details[df_details['character_url'] == row['character_url']].iloc[0]
-        doc = process_character(row, character_details)
+        character_details = details_by_url[row['character_url']]
+        abilities = abilities_by_url.get(row['character_url'], [])
+        doc = process_character(row, character_details, abilities, summaries)
         documents.append(doc)
+        if any(a['description'] and a['description'] != "Placeholder" and a['description'] not in summaries
+               for a in abilities):
+            incomplete.add(row['character_url'])
+    return documents, incomplete
 
-    # Load your existing vector store
-    vectorstore = Chroma.from_documents(
-        documents=documents, 
-        embedding=cached_embedder, 
-        persist_directory=os.path.join(data_path, "swgoh_vectordb")
-    )
 
-retriever = vectorstore.as_retriever(search_kwargs={"k": 10})
+def document_hashes(registry) -> dict:
+    """
+    Hashes everything a unit's document is built from, keyed by character URL:
+    its name, tags, ability classes and abilities, plus the summarizer's model
+    and prompt and DOCUMENT_VERSION. Units without details are left out.
+    """
+    details_by_url = {d['character_url']: d for d in registry.get("details").to_pylist()}
+    abilities_by_url = registry.get("abilities_by_url")
+    summarizer = registry.get("summarizer")
+
+    hashes = {}
+    for row in registry.get("units").to_dict(orient='records'):
+        url = row['character_url']
+        if url not in details_by_url:
+            continue
+        source = [DOCUMENT_VERSION, summarizer.model_name, summarizer.prompt, row['name'], list(row['tags']),
+                  details_by_url[url]['ability_classes'], abilities_by_url.get(url, [])]
+        hashes[url] = hashlib.sha256(json.dumps(source, sort_keys=True).encode('utf-8')).hexdigest()
+    return hashes
+
+
+def manifest_version(registry) -> str:
+    """
+    Cheap key for everything the documents are built from: the data files'
+    sizes and modification times, DOCUMENT_VERSION and the summarizer's model
+    and prompt. While it matches the manifest's, no per-unit work is needed.
+    """
+    source = [DOCUMENT_VERSION, SUMMARY_MODEL, SUMMARY_PROMPT, registry.data_version()]
+    return hashlib.sha256(json.dumps(source).encode('utf-8')).hexdigest()[:16]
+
+
+def sync_vectorstore(vectorstore, registry, manifest_path) -> tuple:
+    """
+    Brings `vectorstore` up to date with the unit tables. Documents use the
+    character URL as their ID, and `manifest_path` records the source hash each
+    one was built from, so only added or changed units are summarized and
+    embedded, and removed units are deleted. When the data files haven't
+    changed since the last complete sync (`manifest_version`), nothing is
+    hashed at all. Units whose summaries partly failed are left out of the
+    manifest, so they are rebuilt on the next sync. Returns `(upserted, deleted)`.
+    """
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if 'units' not in manifest:
+            # Manifests from before the version key were a bare {url: hash}
+            manifest = {'version': None, 'units': manifest}
+
+    version = manifest_version(registry)
+    if manifest is not None and manifest['version'] == version:
+        print("Vector store up to date.")
+        return 0, 0
+
+    hashes = document_hashes(registry)
+    if manifest is None:
+        # No record of what the store holds (e.g. built before manifests, with
+        # random IDs): keep only documents already under their stable ID
+        indexed = {}
+        stale_ids = [i for i in vectorstore.get(include=[])['ids'] if i not in hashes]
+    else:
+        indexed = manifest['units']
+        stale_ids = [url for url in indexed if url not in hashes]
+    changed = [url for url, digest in hashes.items() if indexed.get(url) != digest]
+
+    if stale_ids:
+        vectorstore.delete(ids=stale_ids)
+    incomplete = set()
+    if changed:
+        documents, incomplete = build_documents(registry, changed)
+        # Both backends upsert by ID, so changed units replace their old document
+        vectorstore.add_documents(documents, ids=[doc.metadata['url'] for doc in documents])
+
+    units = {url: digest for url, digest in hashes.items() if url not in incomplete}
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        # Only a complete sync may skip the next one
+        json.dump({'version': None if incomplete else version, 'units': units}, f)
+    os.replace(tmp_path, manifest_path)
+    print(f"Vector store synced: {len(changed)} upserted, {len(stale_ids)} deleted"
+          + (f", {len(incomplete)} to retry." if incomplete else "."))
+    return len(changed), len(stale_ids)
+
+
+@registry.artifact("vectorstore")
+def load_vectorstore(registry):
+    print(f"Loading vector store ({VECTOR_BACKEND})...")
+    if VECTOR_BACKEND == "numpy":
+        from .vector_store import NumpyVectorStore
+        vectorstore = NumpyVectorStore(vectordb_path, registry.get("embedder"), ann_lists=ANN_LISTS)
+    else:
+        from langchain_chroma import Chroma
+        vectorstore = Chroma(
+            persist_directory=vectordb_path,
+            embedding_function=registry.get("embedder")
+        )
+    sync_vectorstore(vectorstore, registry, manifest_path)
+    return vectorstore
+
+
+@registry.artifact("hybrid_index")
+def load_hybrid_index(registry):
+    # Built from what the vector store holds, so both sides rank the same documents
+    stored = registry.get("vectorstore").get(include=["documents", "metadatas"])
+    # The manifest changes whenever any document does, so its hash versions the index
+    with open(manifest_path, 'rb') as f:
+        version = hashlib.sha256(f.read()).hexdigest()[:16]
+    return HybridIndex(stored['ids'], stored['documents'], stored['metadatas'], version=version)
+
+
+def search_units(query: str, k: int = 10, fetch_k: int = 30) -> tuple:
+    """
+    Hybrid search over the unit documents. Tags, ability classes and
+    Zeta/Omicron/Ultimate mentions in the query become filters; a query made of
+    nothing else is answered from the filters alone, without an embedding call.
+    Otherwise BM25 and vector rankings of the filtered units are combined with
+    reciprocal rank fusion. Returns `(ids, total_matches)`; `total_matches`
+    counts every unit passing the filters.
+
+    Results are cached by index version and normalized query.
+    """
+    index = registry.get("hybrid_index")
+    result_cache = registry.get("result_cache")
+    cache_key = f"{index.version}:{k}:{normalize_query(query)}"
+    cached = result_cache.get(cache_key)
+    trace_cache("retrieval", cached is not None)
+    if cached is not None:
+        return cached[0], cached[1]
+
+    ids, total = _search_units(index, query, k, fetch_k)
+    result_cache.put(cache_key, [ids, total])
+    return ids, total
+
+
+def _search_units(index, query, k, fetch_k):
+    filters, residual = index.parse_query(query)
+    candidates = index.filter(filters)
+
+    if filters and not residual:
+        ranked = index.rank(query, candidates)
+        return ranked[:k], len(ranked)
+
+    keyword_ranking = index.rank(" ".join(residual) or query, candidates)
+    if filters and not candidates:
+        return [], 0
+    # The filter goes to the store, so the vector ranking covers every
+    # candidate rather than only those among the top `fetch_k` overall
+    where = {"url": {"$in": candidates}} if filters else None
+    vector_ranking = [doc.metadata['url'] for doc in
+                      registry.get("vectorstore").similarity_search(query, k=fetch_k, filter=where)]
+    ranked = reciprocal_rank_fusion([keyword_ranking, vector_ranking])[:k]
+    # Without filters every unit is a candidate, so there is no match count to report
+    return ranked, len(candidates) if filters else len(ranked)
 
 
 @tool
@@ -121,17 +329,22 @@ def find_relevant_units(query: str) -> str:
     """
     Searches the SWGOH database for character descriptions, mechanics, or tags.
     Use this to identify WHICH characters might be relevant to the user's request.
-    Input should be a natural language search query.
+    Input should be a natural language search query. Faction, role and ability
+    class names (e.g. "Galactic Republic Leader", "Jedi with Omicrons") are
+    matched exactly.
     """
-    # 1. Fetch relevant documents from Chroma
-    docs = retriever.invoke(query)
+    # 1. Rank units by tags, keywords and vector similarity
+    ids, total = search_units(query)
+    index = registry.get("hybrid_index")
     
     # 2. Format the output for the LLM
     # We combine the content and include the URL from metadata so the 
     # agent knows which URL to pass to the 'get_exact_stats' tool.
     results = []
-    for doc in docs:
-        char_info = f"Content: {doc.page_content}\nCharacter URL: {doc.metadata.get('url', 'Unknown')}"
+    for doc_id in ids:
+        char_info = f"Content: {index.texts[doc_id]}\nCharacter URL: {index.metadatas[doc_id].get('url', 'Unknown')}"
         results.append(char_info)
+    if total > len(ids):
+        results.append(f"{total - len(ids)} more units match; refine the query to narrow them down.")
     
     return "\n\n---\n\n".join(results)
\ No newline at end of file
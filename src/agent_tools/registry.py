@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+
+data_path = os.path.join(os.path.dirname(__file__), "../../data")
+
+
+class DataRegistry:
+    """
+    Process-wide, lazily built artifacts shared by every tool: parquet tables,
+    lookup indexes, model clients and the vector store.
+
+    Each artifact has a loader, `loader(registry)`, that runs on the first
+    `get()` and never again; concurrent callers wait for the one build instead
+    of starting their own. Loaders may `get()` other artifacts. Nothing is
+    loaded at import time, so importing the tools is cheap, and `warm_up()`
+    can build artifacts on a background thread before the first question.
+    """
+
+    def __init__(self, data_path, memory_map=True):
+        self.data_path = data_path
+        self.memory_map = memory_map
+        self._loaders = {}
+        self._locks = {}
+        self._values = {}
+
+    def artifact(self, name):
+        """Decorator registering the decorated function as the loader for `name`."""
+        def decorator(loader):
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+            return loader
+        return decorator
+
+    def get(self, name):
+        if name in self._values:
+            return self._values[name]
+        with self._locks[name]:
+            if name not in self._values:
+                self._values[name] = self._loaders[name](self)
+            return self._values[name]
+
+    def is_loaded(self, name):
+        return name in self._values
+
+    def reset(self, name):
+        """Drops a built artifact so that the next `get()` rebuilds it."""
+        with self._locks[name]:
+            self._values.pop(name, None)
+
+    def path(self, filename):
+        return os.path.join(self.data_path, filename)
+
+    def data_version(self, filenames=("swgoh_units.parquet", "character_details.parquet",
+                                      "character_abilities.parquet")):
+        """
+        Identifies the current contents of the data files by their sizes and
+        modification times, so caches can tell when the data was rewritten.
+        """
+        stamps = []
+        for filename in filenames:
+            try:
+                stat = os.stat(self.path(filename))
+                stamps.append(f"{stat.st_size}-{stat.st_mtime_ns}")
+            except FileNotFoundError:
+                stamps.append("missing")
+        return hashlib.sha256("|".join(stamps).encode('utf-8')).hexdigest()[:16]
+
+    def read_table(self, filename):
+        """Reads a parquet file from the data directory as an Arrow table, memory-mapped if enabled."""
+        import pyarrow.parquet as pq
+        return pq.read_table(self.path(filename), memory_map=self.memory_map)
+
+    def warm_up(self, names=None):
+        """
+        Builds `names` (default: every registered artifact) on a daemon thread.
+        Failures are reported and left for the first real `get()` to raise.
+        Returns the thread.
+        """
+        names = list(names or self._loaders)
+
+        def run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Warm-up of '{name}' failed: {e}")
+
+        thread = threading.Thread(target=run, name="registry-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+
+registry = DataRegistry(data_path, memory_map=os.environ.get("SWGOH_MEMORY_MAP", "1") != "0")
+
+
+@registry.artifact("units")
+def load_units(registry):
+    return registry.read_table("swgoh_units.parquet").to_pandas()
+
+
+@registry.artifact("details")
+def load_details(registry):
+    return registry.read_table("character_details.parquet")
+
+
+@registry.artifact("abilities")
+def load_abilities(registry):
+    return registry.read_table("character_abilities.parquet")
+
+
+@registry.artifact("abilities_by_url")
+def load_abilities_by_url(registry):
+    """Groups the abilities table into {character_url: [ability, ...]} in page order."""
+    abilities_by_url = {}
+    for ability in registry.get("abilities").drop_columns(['ability_index']).to_pylist():
+        abilities_by_url.setdefault(ability.pop('character_url'), []).append(ability)
+    return abilities_by_url
@@ -0,0 +1,201 @@
+import json
+import re
+
+import numpy as np
+import pyarrow.compute as pc
+from langchain_core.tools import tool
+
+from .character_data import normalize_url
+from .registry import registry
+
+FLAGS = ("zeta", "omicron", "ultimate")
+STAT_FILTER_RE = re.compile(r"^\s*([A-Za-z][A-Za-z _]*?)\s*(>=|<=|>|<|=)\s*(-?[\d,]*\.?\d+)\s*%?\s*$")
+COMPARISONS = {">=": np.greater_equal, "<=": np.less_equal, ">": np.greater, "<": np.less, "=": np.equal}
+MAX_LIMIT = 50
+
+
+def stat_key(label):
+    """'Physical Critical Chance' or 'physical_critical_chance' -> 'physical_critical_chance'"""
+    return re.sub(r'[^a-z0-9]+', '_', label.lower()).strip('_')
+
+
+class Bitsets:
+    """
+    One bitset per unit over a vocabulary of labels (tags, ability classes),
+    packed into uint64 words so that "has all of these" and "has any of
+    these" are a few vectorized AND/compare operations over the whole roster.
+    """
+
+    def __init__(self, label_lists, kind="label"):
+        self.kind = kind
+        self.vocabulary = {}  # lower-cased label -> (bit, label)
+        for labels in label_lists:
+            for label in labels:
+                self.vocabulary.setdefault(label.lower(), (len(self.vocabulary), label))
+        self.words = np.zeros((len(label_lists), max(1, -(-len(self.vocabulary) // 64))), dtype=np.uint64)
+        for row, labels in enumerate(label_lists):
+            for label in labels:
+                bit = self.vocabulary[label.lower()][0]
+                self.words[row, bit // 64] |= np.uint64(1 << (bit % 64))
+
+    def mask(self, labels):
+        """Query word of `labels`; raises ValueError naming any label not in the vocabulary."""
+        unknown = [label for label in labels if label.lower() not in self.vocabulary]
+        if unknown:
+            known = ', '.join(sorted(label for _, label in self.vocabulary.values()))
+            raise ValueError(f"Unknown {self.kind} {', '.join(map(repr, unknown))}. Known: {known}")
+        query = np.zeros(self.words.shape[1], dtype=np.uint64)
+        for label in labels:
+            bit = self.vocabulary[label.lower()][0]
+            query[bit // 64] |= np.uint64(1 << (bit % 64))
+        return query
+
+    def has_all(self, labels):
+        query = self.mask(labels)
+        return ((self.words & query) == query).all(axis=1)
+
+    def has_any(self, labels):
+        return (self.words & self.mask(labels)).any(axis=1)
+
+
+class RosterTable:
+    """
+    Column-oriented copy of the roster for aggregate questions: tag and
+    ability class bitsets, one float64 array per base stat (NaN when a unit
+    has no details) and one boolean array per ability flag, all aligned to
+    the units table.
+    """
+
+    def __init__(self, units, details, abilities):
+        self.names = units['name'].to_numpy(dtype=object)
+        self.urls = units['character_url'].to_numpy(dtype=object)
+        self.tags = [list(tags) for tags in units['tags']]
+        self.tag_bits = Bitsets(self.tags, "tag")
+        positions = {normalize_url(url): i for i, url in enumerate(self.urls)}
+
+        # Scatter the details rows into unit order
+        rows = np.array([positions.get(normalize_url(url), -1) for url in details.column('character_url').to_pylist()],
+                        dtype=np.int64)
+        present = rows >= 0
+        classes = [[] for _ in self.urls]
+        for row, unit_classes in zip(rows, details.column('ability_classes').to_pylist()):
+            if row >= 0:
+                classes[row] = unit_classes or []
+        self.class_bits = Bitsets(classes, "ability class")
+
+        stats = details.column('base_stats').combine_chunks()
+        self.stats = {}
+        for i, field in enumerate(stats.type):
+            column = np.full(len(self.urls), np.nan)
+            column[rows[present]] = stats.field(i).to_numpy(zero_copy_only=False)[present]
+            self.stats[field.name] = column
+
+        # Per-unit ability flags from the normalized abilities table
+        grouped = abilities.group_by('character_url').aggregate([(f'is_{flag}', 'any') for flag in FLAGS])
+        flag_rows = np.array([positions.get(normalize_url(url), -1) for url in grouped.column('character_url').to_pylist()],
+                             dtype=np.int64)
+        known = flag_rows >= 0
+        self.flags = {}
+        for flag in FLAGS:
+            column = np.zeros(len(self.urls), dtype=bool)
+            values = pc.fill_null(grouped.column(f'is_{flag}_any'), False).to_numpy(zero_copy_only=False)
+            column[flag_rows[known]] = values[known]
+            self.flags[flag] = column
+
+    def stat(self, name):
+        key = stat_key(name)
+        if key not in self.stats:
+            raise ValueError(f"Unknown stat '{name}'. Known: {', '.join(self.stats)}")
+        return key, self.stats[key]
+
+    def query(self, tags=(), any_tags=(), exclude_tags=(), ability_classes=(), stat_filters=(), flags=(),
+              sort_by=None, ascending=False, limit=10):
+        """
+        Returns `(rows, total)`: up to `limit` matching rows (index arrays
+        into the table) in sort order, and the number of units matching.
+        Stat filters are strings like "speed >= 250". Raises ValueError on an
+        unknown tag, ability class, stat or flag.
+        """
+        mask = np.ones(len(self.urls), dtype=bool)
+        if tags:
+            mask &= self.tag_bits.has_all(tags)
+        if any_tags:
+            mask &= self.tag_bits.has_any(any_tags)
+        if exclude_tags:
+            mask &= ~self.tag_bits.has_any(exclude_tags)
+        if ability_classes:
+            mask &= self.class_bits.has_all(ability_classes)
+        for flag in flags:
+            if flag.lower() not in self.flags:
+                raise ValueError(f"Unknown flag '{flag}'. Known: {', '.join(FLAGS)}")
+            mask &= self.flags[flag.lower()]
+        for stat_filter in stat_filters:
+            match = STAT_FILTER_RE.match(stat_filter)
+            if not match:
+                raise ValueError(f"Can't parse stat filter '{stat_filter}'; use e.g. 'speed >= 250'")
+            _, values = self.stat(match.group(1))
+            # NaN compares False, so units without stats drop out
+            mask &= COMPARISONS[match.group(2)](values, float(match.group(3).replace(',', '')))
+
+        rows = np.flatnonzero(mask)
+        total = len(rows)
+        limit = max(0, min(limit, MAX_LIMIT))
+        if sort_by:
+            _, values = self.stat(sort_by)
+            keys = values[rows] if ascending else -values[rows]
+            keys = np.where(np.isnan(keys), np.inf, keys)  # missing stats sort last either way
+            if limit < len(rows):
+                top = np.argpartition(keys, limit)[:limit]
+                rows, keys = rows[top], keys[top]
+            rows = rows[np.argsort(keys, kind='stable')]
+        return rows[:limit], total
+
+    def records(self, rows, stats=()):
+        """Compact result records for `rows`, with the values of `stats` included."""
+        keys = [stat_key(s) for s in stats]
+        records = []
+        for row in rows:
+            record = {'name': self.names[row], 'character_url': self.urls[row], 'tags': self.tags[row]}
+            for key in keys:
+                value = self.stats[key][row]
+                record[key] = None if np.isnan(value) else float(value)
+            records.append(record)
+        return records
+
+
+@registry.artifact("roster_table")
+def load_roster_table(registry):
+    return RosterTable(registry.get("units"), registry.get("details"), registry.get("abilities"))
+
+
+@tool
+def query_roster(tags: list[str] = None, any_tags: list[str] = None, exclude_tags: list[str] = None,
+                 ability_classes: list[str] = None, stat_filters: list[str] = None, flags: list[str] = None,
+                 sort_by: str = None, ascending: bool = False, limit: int = 10) -> str:
+    """
+    Filters, sorts and ranks the WHOLE roster in one call. Use this for
+    aggregate questions such as "fastest Dark Side attackers" or "all Galactic
+    Legends sorted by health".
+
+    - tags: units must have ALL of these tags (e.g. ["Dark Side", "Attacker"])
+    - any_tags: units must have AT LEAST ONE of these tags
+    - exclude_tags: units must have NONE of these tags
+    - ability_classes: units must have all of these ability classes (e.g. ["Taunt"])
+    - stat_filters: conditions on base stats, e.g. ["speed >= 250", "health > 50000"]
+    - flags: any of "zeta", "omicron", "ultimate"; units must have an ability with each
+    - sort_by: a base stat to rank by, e.g. "speed"; highest first unless ascending
+    - limit: number of units to return (at most 50)
+
+    Returns the total number of matches and the top units with their URLs,
+    tags and the stats used in the query.
+    """
+    table = registry.get("roster_table")
+    stat_filters = stat_filters or []
+    try:
+        rows, total = table.query(tags or [], any_tags or [], exclude_tags or [], ability_classes or [],
+                                  stat_filters, flags or [], sort_by, ascending, limit)
+        stats = ([sort_by] if sort_by else []) + [STAT_FILTER_RE.match(f).group(1) for f in stat_filters]
+        records = table.records(rows, dict.fromkeys(stat_key(s) for s in stats))
+    except ValueError as e:
+        return f"Error: {e}"
+    return json.dumps({'total': total, 'units': records}, separators=(',', ':'))
@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+
+SUMMARY_PROMPT = "Summarize the following SWGOH character ability description in one to three concise sentences, focusing on the core mechanics and effects. Limit your response to only the summary of the ability, given only the information shown. Make it high level and as snappy as possible. Omit exact quantities to keep things brief. Keep the format simple, no titles or bullet points, just provide the summary:\n\n{description}"
+
+
+class SummaryCache:
+    """
+    On-disk cache of ability summaries in a single JSON file.
+    Call `save()` once a batch of summaries has been added.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._entries = json.load(f)
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, summary):
+        with self._lock:
+            self._entries[key] = summary
+
+    def save(self):
+        with self._lock:
+            snapshot = dict(self._entries)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+
+def response_text(response):
+    """Text of a chat model response, whether its content is a string or a list of parts."""
+    content = response.content
+    if isinstance(content, str):
+        return content
+    return "".join(part['text'] if isinstance(part, dict) else str(part) for part in content)
+
+
+class AbilitySummarizer:
+    """
+    Summarizes ability descriptions with a chat model, once per distinct text.
+
+    Summaries are cached under a hash of the model name, the prompt template
+    and the description, so a rebuild only calls the model for new or changed
+    descriptions, and changing the model or prompt invalidates old entries.
+    Uncached descriptions are sent through the model's async batch API with at
+    most `max_concurrency` requests in flight. Any LangChain chat model works,
+    including the fake ones in `langchain_core.language_models`.
+    """
+
+    def __init__(self, llm, cache, max_concurrency=8, prompt=SUMMARY_PROMPT, model_name=None):
+        self.llm = llm
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.prompt = prompt
+        self.model_name = model_name or getattr(llm, 'model', None) or type(llm).__name__
+
+    def cache_key(self, description):
+        payload = json.dumps([self.model_name, self.prompt, description])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def asummarize_all(self, descriptions):
+        """
+        Returns {description: summary} for every non-empty description the
+        model summarized. Descriptions it fails on are left out and not
+        cached, so callers can fall back to the original text and retry later.
+        """
+        summaries = {}
+        pending = []
+        for description in dict.fromkeys(d for d in descriptions if d):
+            cached = self.cache.get(self.cache_key(description))
+            if cached is None:
+                pending.append(description)
+            else:
+                summaries[description] = cached
+
+        if pending:
+            print(f"Summarizing {len(pending)} abilities ({len(summaries)} cached)...")
+            responses = await self.llm.abatch(
+                [self.prompt.format(description=d) for d in pending],
+                config={"max_concurrency": self.max_concurrency},
+                return_exceptions=True,
+            )
+            for description, response in zip(pending, responses):
+                if isinstance(response, Exception):
+                    print(f"Error summarizing ability: {response}")
+                    continue
+                summaries[description] = response_text(response)
+                self.cache.put(self.cache_key(description), summaries[description])
+            self.cache.save()
+        return summaries
+
+    def summarize_all(self, descriptions):
+        """Blocking wrapper around `asummarize_all`; call it from a thread with no running event loop."""
+        return asyncio.run(self.asummarize_all(descriptions))
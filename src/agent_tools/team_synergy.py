@@ -0,0 +1,196 @@
+import json
+import os
+import re
+
+import numpy as np
+from langchain_core.tools import tool
+
+from .character_data import normalize_url, resolve_character
+from .registry import registry
+
+SYNERGY_FILE = "team_synergy.json"
+ALIGNMENT_TAGS = {"Light Side", "Dark Side", "Neutral"}
+ROLE_TAGS = {"Attacker", "Support", "Tank", "Healer", "Leader"}
+# Scoring weights: a tag the leader's ability names counts most, a related
+# tag (by co-occurrence) partially, a faction tag merely shared the least
+REFERENCED_TAG, SHARED_TAG, NAMED_UNIT, OTHER_ALIGNMENT = 3.0, 1.0, 4.0, -2.0
+ROLE_COVERAGE = 0.5
+TEAM_SIZE = 5
+TOP_TEAMMATES = 20
+
+
+def tag_references(text, tags):
+    """Tags named in `text`, longest first so "Jedi Vanguard" isn't also read as "Jedi"."""
+    found = []
+    for tag in sorted(tags, key=len, reverse=True):
+        pattern = re.compile(rf"\b{re.escape(tag)}\b", re.I)
+        if pattern.search(text):
+            found.append(tag)
+            text = pattern.sub(" ", text)
+    return found
+
+
+class SynergyGraph:
+    """
+    Tag co-occurrence over the roster. `affinity[a, b]` is the share of units
+    tagged `a` that are also tagged `b`; `idf[t]` down-weights tags most units
+    have. Alignment and role tags are left out: they describe every team.
+    """
+
+    def __init__(self, unit_tags):
+        self.tags = sorted({t for tags in unit_tags for t in tags} - ALIGNMENT_TAGS - ROLE_TAGS)
+        self.positions = {t: i for i, t in enumerate(self.tags)}
+        self.matrix = np.zeros((len(unit_tags), len(self.tags)), dtype=np.float32)
+        for row, tags in enumerate(unit_tags):
+            for tag in tags:
+                if tag in self.positions:
+                    self.matrix[row, self.positions[tag]] = 1.0
+        counts = self.matrix.sum(axis=0)
+        self.cooccurrence = self.matrix.T @ self.matrix
+        self.affinity = self.cooccurrence / np.maximum(counts, 1)[:, None]
+        self.idf = np.log((len(unit_tags) + 1) / (counts + 1)) + 1.0
+
+    def vector(self, tags):
+        vector = np.zeros(len(self.tags), dtype=np.float32)
+        for tag in tags:
+            if tag in self.positions:
+                vector[self.positions[tag]] = 1.0
+        return vector
+
+    def related(self, tag, limit=5):
+        """Tags most often found on units tagged `tag`, with their affinity."""
+        row = self.affinity[self.positions[tag]]
+        order = [i for i in np.argsort(-row) if self.tags[i] != tag and row[i] > 0][:limit]
+        return [(self.tags[i], round(float(row[i]), 3)) for i in order]
+
+
+def build_synergy(units, abilities):
+    """
+    Precomputes, for every unit, the faction tags and units its leader ability
+    refers to, its ranked candidate teammates and a suggested 5-unit squad
+    with it as leader. Units without a leader ability are ranked on shared
+    faction tags alone. Returns a JSON-ready dict keyed by `normalize_url`.
+    """
+    names = list(units['name'])
+    urls = list(units['character_url'])
+    unit_tags = [list(tags) for tags in units['tags']]
+    graph = SynergyGraph(unit_tags)
+    all_tags = {t for tags in unit_tags for t in tags} - ALIGNMENT_TAGS - ROLE_TAGS
+    positions = {normalize_url(url): i for i, url in enumerate(urls)}
+    name_patterns = [(i, re.compile(rf"\b{re.escape(name)}\b")) for i, name in enumerate(names)
+                     if len(name) > 3 and name not in all_tags]
+
+    leader_text = {}
+    for ability in abilities.select(['character_url', 'ability_type', 'description']).to_pylist():
+        if ability['ability_type'] == 'Leader' and ability['description']:
+            row = positions.get(normalize_url(ability['character_url']))
+            if row is not None:
+                leader_text[row] = leader_text.get(row, "") + " " + ability['description']
+
+    alignment = np.array([next((t for t in tags if t in ALIGNMENT_TAGS), "Neutral") for tags in unit_tags])
+    roles = [set(tags) & ROLE_TAGS for tags in unit_tags]
+    weighted = graph.matrix * graph.idf  # each unit's faction tags, weighted by specificity
+    result = {}
+    for row in range(len(urls)):
+        text = leader_text.get(row, "")
+        references = tag_references(text, all_tags) if text else []
+        mentions = [i for i, pattern in name_patterns if i != row and pattern.search(text)]
+        own = graph.vector(unit_tags[row])
+
+        score = weighted @ own * SHARED_TAG
+        if references:
+            refs = graph.vector(references)
+            held = graph.matrix @ (refs * graph.idf)
+            # Partial credit for tags that usually come with a referenced one
+            related = (graph.matrix[:, None, :] * graph.affinity[refs > 0][None, :, :]).max(axis=2)
+            partial = ((1 - graph.matrix[:, refs > 0]) * related) @ graph.idf[refs > 0]
+            score += REFERENCED_TAG * held + partial
+        score[mentions] += NAMED_UNIT
+        if alignment[row] != "Neutral":
+            score[(alignment != alignment[row]) & (alignment != "Neutral")] += OTHER_ALIGNMENT
+        score[row] = -np.inf
+
+        ranked = [int(i) for i in np.argsort(-score, kind='stable')[:TOP_TEAMMATES] if score[i] > 0]
+        result[normalize_url(urls[row])] = {
+            'references': references,
+            'mentions': [urls[i] for i in mentions],
+            'teammates': [[urls[i], round(float(score[i]), 3)] for i in ranked],
+            'squad': [urls[i] for i in _assemble_squad(ranked, score, roles, roles[row])],
+        }
+    return {
+        'units': result,
+        'related_tags': {tag: graph.related(tag) for tag in graph.tags},
+    }
+
+
+def _assemble_squad(ranked, score, roles, leader_roles):
+    """Greedily picks TEAM_SIZE - 1 teammates by score, with a bonus for roles the squad lacks."""
+    squad, covered = [], set(leader_roles)
+    candidates = list(ranked)
+    while candidates and len(squad) < TEAM_SIZE - 1:
+        best = max(candidates, key=lambda i: score[i] + ROLE_COVERAGE * len(roles[i] - covered - {"Leader"}))
+        squad.append(best)
+        covered |= roles[best]
+        candidates.remove(best)
+    return squad
+
+
+def save_synergy(synergy, path, version):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': version, **synergy}, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+@registry.artifact("team_synergy")
+def load_team_synergy(registry):
+    # Built offline by build_synergy.py; rebuilt here if missing or stale
+    path = registry.path(SYNERGY_FILE)
+    version = registry.data_version()
+    if os.path.exists(path):
+        with open(path) as f:
+            synergy = json.load(f)
+        if synergy.get('version') == version:
+            return synergy
+    print("Team synergy index missing or stale; rebuilding...")
+    synergy = build_synergy(registry.get("units"), registry.get("abilities"))
+    save_synergy(synergy, path, version)
+    return synergy
+
+
+@registry.artifact("unit_cards")
+def load_unit_cards(registry):
+    """Name, URL and tags of every unit, keyed by `normalize_url`."""
+    units = registry.get("units")[['name', 'character_url', 'tags']].to_dict(orient='records')
+    return {normalize_url(u['character_url']): {**u, 'tags': list(u['tags'])} for u in units}
+
+
+@tool
+def suggest_team(leader: str) -> str:
+    """
+    Suggests a 5-unit squad built around a leader, from precomputed synergy:
+    the factions and units the leader's ability refers to, shared tags and
+    role coverage. `leader` may be a character name, nickname or URL.
+    Returns the squad, a bench of further candidates, and the tags the
+    leader's ability references. Use get_characters_data to check the squad.
+    """
+    key, candidates = resolve_character(leader)
+    if candidates:
+        names = ", ".join(c['name'] for c in candidates)
+        return f"'{leader}' could mean several characters: {names}. Ask the user which one they mean."
+    if key is None:
+        return f"Character '{leader}' not found."
+    synergy = registry.get("team_synergy")
+    cards = registry.get("unit_cards")
+    entry = synergy['units'].get(key)
+    if entry is None:
+        return f"No synergy data for '{leader}'."
+
+    squad = [cards[key]] + [cards[normalize_url(url)] for url in entry['squad']]
+    bench = [cards[normalize_url(url)] for url, _ in entry['teammates'] if url not in entry['squad']][:5]
+    return json.dumps({
+        'leader_references': entry['references'],
+        'related_tags': {tag: [t for t, _ in synergy['related_tags'].get(tag, [])] for tag in entry['references']},
+        'squad': squad,
+        'bench': bench,
+    }, separators=(',', ':'))
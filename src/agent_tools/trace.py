@@ -0,0 +1,13 @@
+import logging
+
+# Trace events from the tools go to this logger; telemetry.py attaches the
+# JSONL writer to it when tracing is started
+TRACE_LOGGER = "swgoh.trace"
+trace_logger = logging.getLogger(TRACE_LOGGER)
+trace_logger.propagate = False
+
+
+def emit(kind, name, **fields):
+    """Records one event; a no-op unless tracing was started."""
+    if trace_logger.isEnabledFor(logging.INFO):
+        trace_logger.info(kind, extra={"trace": {"kind": kind, "name": name, **fields}})
@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class NumpyVectorStore:
+    """
+    Local vector store for small corpora: embeddings live in one contiguous,
+    L2-normalized float32 matrix, so top-k cosine search is a single
+    matrix-vector (or, for batches, matrix-matrix) product.
+
+    The store persists to `directory` as `vectors.npy`, memory-mapped on load,
+    and `documents.json` with the IDs, texts and metadata. Writes rewrite both
+    files, which is fine at roster scale.
+
+    It implements the parts of the LangChain vector store API the tools use
+    (`get`, `add_documents`, `delete`, `similarity_search`,
+    `similarity_search_by_vector`), so it can stand in for Chroma. Searches
+    take a Chroma-style metadata `filter` (`{"field": value}` or
+    `{"field": {"$in": [...]}}`), applied before ranking.
+
+    With `ann_lists` set, searches go through an inverted-file (IVF) index:
+    vectors are clustered around `ann_lists` k-means centroids, and a query
+    only scores the vectors in its `ann_probes` nearest clusters. It is built
+    lazily on the first search after a change; leave it off for a few hundred
+    documents, where exact search is already fast.
+    """
+
+    def __init__(self, directory, embedding_function, ann_lists=None, ann_probes=4):
+        self.directory = directory
+        self.embedding_function = embedding_function
+        self.ann_lists = ann_lists
+        self.ann_probes = ann_probes
+        self._lock = threading.Lock()
+        self._ivf = None
+        self.ids, self.texts, self.metadatas = [], [], []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+        os.makedirs(directory, exist_ok=True)
+        documents_path = os.path.join(directory, "documents.json")
+        if os.path.exists(documents_path):
+            with open(documents_path) as f:
+                stored = json.load(f)
+            self.ids, self.texts, self.metadatas = stored['ids'], stored['documents'], stored['metadatas']
+            self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode='r')
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def _save(self):
+        np.save(os.path.join(self.directory, "vectors.npy.tmp.npy"), np.ascontiguousarray(self.vectors))
+        os.replace(os.path.join(self.directory, "vectors.npy.tmp.npy"), os.path.join(self.directory, "vectors.npy"))
+        tmp_path = os.path.join(self.directory, "documents.json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({'ids': self.ids, 'documents': self.texts, 'metadatas': self.metadatas}, f)
+        os.replace(tmp_path, os.path.join(self.directory, "documents.json"))
+        self.vectors = np.load(os.path.join(self.directory, "vectors.npy"), mmap_mode='r')
+
+    def get(self, include=("documents", "metadatas")):
+        result = {'ids': list(self.ids)}
+        if "documents" in include:
+            result['documents'] = list(self.texts)
+        if "metadatas" in include:
+            result['metadatas'] = list(self.metadatas)
+        return result
+
+    def add_documents(self, documents, ids):
+        """Inserts documents, replacing any already stored under the same ID. Returns the IDs."""
+        if not documents:
+            return []
+        vectors = self._normalize(self.embedding_function.embed_documents([d.page_content for d in documents]))
+        with self._lock:
+            matrix = np.array(self.vectors) if len(self.ids) else np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            new_rows = []
+            for doc, doc_id, vector in zip(documents, ids, vectors):
+                if doc_id in self._positions:
+                    i = self._positions[doc_id]
+                    matrix[i] = vector
+                    self.texts[i], self.metadatas[i] = doc.page_content, doc.metadata
+                else:
+                    self._positions[doc_id] = len(self.ids)
+                    self.ids.append(doc_id)
+                    self.texts.append(doc.page_content)
+                    self.metadatas.append(doc.metadata)
+                    new_rows.append(vector)
+            if new_rows:
+                matrix = np.vstack([matrix, np.stack(new_rows)])
+            self.vectors = matrix
+            self._ivf = None
+            self._save()
+        return list(ids)
+
+    def delete(self, ids):
+        with self._lock:
+            drop = {self._positions[doc_id] for doc_id in ids if doc_id in self._positions}
+            if not drop:
+                return
+            keep = [i for i in range(len(self.ids)) if i not in drop]
+            self.vectors = np.array(self.vectors[keep])
+            self.ids = [self.ids[i] for i in keep]
+            self.texts = [self.texts[i] for i in keep]
+            self.metadatas = [self.metadatas[i] for i in keep]
+            self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+            self._ivf = None
+            self._save()
+
+    def _build_ivf(self, iterations=10):
+        """k-means over the stored vectors; returns (centroids, list of row-index arrays)."""
+        n_lists = min(self.ann_lists, len(self.ids))
+        rng = np.random.default_rng(0)
+        centroids = np.array(self.vectors[rng.choice(len(self.ids), n_lists, replace=False)])
+        for _ in range(iterations):
+            assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = self.vectors[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = self._normalize(centroids)
+        assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+        return centroids, [np.flatnonzero(assignment == c) for c in range(n_lists)]
+
+    def _filter_rows(self, where):
+        """Indices of the rows whose metadata satisfies every condition in `where`."""
+        def matches(metadata):
+            for field, condition in where.items():
+                value = metadata.get(field)
+                if isinstance(condition, dict) and "$in" in condition:
+                    if value not in condition["$in"]:
+                        return False
+                elif value != condition:
+                    return False
+            return True
+
+        return np.array([i for i, metadata in enumerate(self.metadatas) if matches(metadata)], dtype=np.int64)
+
+    def _top_k(self, query_vectors, k, filter=None):
+        """Row indices and scores of the top-k matches for each normalized query vector."""
+        if not self.ids:
+            return [([], []) for _ in query_vectors]
+        if filter:
+            # Exact search over the rows passing the filter, so none are lost to an IVF probe
+            rows = self._filter_rows(filter)
+            if not len(rows):
+                return [([], []) for _ in query_vectors]
+            results = []
+            for row in query_vectors @ self.vectors[rows].T:
+                order = np.argsort(-row)[:k]
+                results.append((rows[order], row[order]))
+            return results
+        if not self.ann_lists:
+            scores = query_vectors @ self.vectors.T
+            k = min(k, scores.shape[1])
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for row, candidates in zip(scores, top):
+                order = candidates[np.argsort(-row[candidates])]
+                results.append((order, row[order]))
+            return results
+
+        with self._lock:
+            if self._ivf is None:
+                self._ivf = self._build_ivf()
+            centroids, lists = self._ivf
+        results = []
+        for query in query_vectors:
+            probes = np.argsort(-(centroids @ query))[:self.ann_probes]
+            candidates = np.concatenate([lists[c] for c in probes])
+            scores = self.vectors[candidates] @ query
+            order = np.argsort(-scores)[:k]
+            results.append((candidates[order], scores[order]))
+        return results
+
+    def _documents(self, rows):
+        return [Document(page_content=self.texts[i], metadata=self.metadatas[i], id=self.ids[i]) for i in rows]
+
+    def similarity_search_by_vector(self, embedding, k=4, filter=None):
+        rows, _ = self._top_k(self._normalize([embedding]), k, filter)[0]
+        return self._documents(rows)
+
+    def similarity_search(self, query, k=4, filter=None):
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k, filter)
+
+    def similarity_search_batch(self, queries, k=4, filter=None):
+        """Top-k documents for several queries, scored with one matrix product."""
+        vectors = self._normalize([self.embedding_function.embed_query(q) for q in queries])
+        return [self._documents(rows) for rows, _ in self._top_k(vectors, k, filter)]
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent_tools.query_cache import LRUCache, normalize_query, trace_cache
+from graph import message_text, stream_tokens
+
+
+class AnswerCache:
+    """
+    Cache of final answers to opening questions, in front of the agent.
+
+    A question matches an entry if its normalized text is identical, or, with
+    `embeddings_fn`, if its embedding's cosine similarity to a cached question
+    is at least `threshold`. `embeddings_fn()` returns the embedding model; it
+    is only called on the first lookup or store, so creating the cache doesn't
+    load the model. Keys carry `version_fn()`, so entries stop matching
+    as soon as the data or index they were answered from changes. Entries
+    expire after `ttl` seconds and the least recently used are evicted past
+    `max_entries`; with a `path` they persist across restarts.
+    """
+
+    def __init__(self, version_fn, embeddings_fn=None, threshold=0.95, max_entries=512, ttl=7 * 24 * 3600,
+                 path=None):
+        self.version_fn = version_fn
+        self.embeddings_fn = embeddings_fn
+        self.threshold = threshold
+        self.entries = LRUCache(max_entries=max_entries, ttl=ttl, path=path)
+        self._lock = threading.Lock()
+        self._matrix = None  # (version, keys, normalized question vectors)
+
+    def _vector(self, question):
+        vector = np.asarray(self.embeddings_fn().embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _semantic_index(self, version):
+        with self._lock:
+            if self._matrix is None or self._matrix[0] != version:
+                prefix = version + ":"
+                items = [(k, v["vector"]) for k, v in self.entries.items() if k.startswith(prefix) and v.get("vector")]
+                keys = [k for k, _ in items]
+                vectors = np.asarray([v for _, v in items], dtype=np.float32) if items else None
+                self._matrix = (version, keys, vectors)
+            return self._matrix
+
+    def lookup(self, question):
+        """Returns the cached answer to `question`, or None."""
+        answer = self._lookup(question)
+        trace_cache("answer", answer is not None)
+        return answer
+
+    def _lookup(self, question):
+        version = self.version_fn()
+        hit = self.entries.get(f"{version}:{normalize_query(question)}")
+        if hit is not None:
+            return hit["answer"]
+        if self.embeddings_fn is None:
+            return None
+
+        _, keys, vectors = self._semantic_index(version)
+        if not keys:
+            return None
+        scores = vectors @ self._vector(question)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        hit = self.entries.get(keys[best])
+        if hit is None:
+            # Evicted or expired since the index was built
+            with self._lock:
+                self._matrix = None
+            return None
+        return hit["answer"]
+
+    def store(self, question, answer):
+        entry = {"answer": answer}
+        if self.embeddings_fn is not None:
+            entry["vector"] = self._vector(question).tolist()
+        self.entries.put(f"{self.version_fn()}:{normalize_query(question)}", entry)
+        with self._lock:
+            self._matrix = None
+
+    def save(self):
+        self.entries.save()
+
+
+async def _is_new_session(agent, thread_id):
+    if thread_id is None or agent.checkpointer is None:
+        return True
+    state = await agent.aget_state({"configurable": {"thread_id": thread_id}})
+    return not state.values.get("messages")
+
+
+async def final_answer(agent, thread_id):
+    """
+    Text of the agent's last reply in a checkpointed session, or None if the
+    turn didn't end in a plain answer. Narration the model streamed before
+    its tool calls isn't part of it.
+    """
+    state = await agent.aget_state({"configurable": {"thread_id": thread_id}})
+    messages = state.values.get("messages") or []
+    if not messages or not isinstance(messages[-1], AIMessage) or messages[-1].tool_calls:
+        return None
+    return message_text(messages[-1]) or None
+
+
+async def cached_stream_tokens(agent, cache, user_input, thread_id=None, callbacks=None):
+    """
+    `stream_tokens` with `cache` in front. Only a session's first question is
+    looked up or cached; follow-ups depend on the conversation so far. A hit
+    is yielded in one piece and recorded in the session's checkpoint as if the
+    agent had answered it. What gets cached is the final reply read back from
+    the checkpoint, so `agent` needs a checkpointer for answers to be stored.
+    """
+    if cache is None or not await _is_new_session(agent, thread_id):
+        async for token in stream_tokens(agent, user_input, thread_id, callbacks):
+            yield token
+        return
+
+    # Embedding the question may be a network call; keep it off the event loop
+    answer = await asyncio.to_thread(cache.lookup, user_input)
+    if answer is not None:
+        if thread_id is not None and agent.checkpointer is not None:
+            await agent.aupdate_state({"configurable": {"thread_id": thread_id}},
+                                      {"messages": [HumanMessage(user_input), AIMessage(answer)]},
+                                      as_node="chatbot")
+        yield answer
+        return
+
+    if agent.checkpointer is None:
+        async for token in stream_tokens(agent, user_input, thread_id, callbacks):
+            yield token
+        return
+    thread_id = thread_id or str(uuid.uuid4())
+    async for token in stream_tokens(agent, user_input, thread_id, callbacks):
+        yield token
+    answer = await final_answer(agent, thread_id)
+    if answer is not None:
+        await asyncio.to_thread(cache.store, user_input, answer)
+
+
+def default_answer_cache():
+    """
+    The answer cache used by the agent and server: keyed on the data files
+    and vector index versions, matching near-duplicates with the configured
+    embedding model. SWGOH_ANSWER_CACHE_THRESHOLD sets the similarity
+    threshold (0.95 by default).
+    """
+    from agent_tools.registry import registry
+
+    def version():
+        return f"{registry.data_version()}-{registry.get('hybrid_index').version}"
+
+    # The embedder is resolved on first use, so creating the cache stays cheap
+    return AnswerCache(version, embeddings_fn=lambda: registry.get("embedder"),
+                       threshold=float(os.environ.get("SWGOH_ANSWER_CACHE_THRESHOLD", 0.95)),
+                       path=registry.path("query_cache/answers.json"))
@@ -0,0 +1,373 @@
+"""
+Offline benchmark and regression check for the whole agent pipeline.
+
+    python bench_pipeline.py --units 60 --output bench_results.json
+    python bench_pipeline.py --save-baseline          # record bench_baseline.json
+    python bench_pipeline.py --baseline bench_baseline.json --timing-threshold 1.0
+
+Runs without network or API keys, against deterministic stand-ins: unit pages
+rendered from the roster into HTML fixtures (or a directory of saved pages,
+`--html-dir`), the hashing embedder, the numpy vector store, a fixed-answer
+summarizer and a scripted chat model that searches, fetches and answers.
+Everything is built in a temporary data directory.
+
+Scenarios: `parse_character_details` (fixtures served on localhost),
+`index_build` (summaries, embeddings, vector store and hybrid index from
+scratch), `find_relevant_units` (cold caches), `get_character_data` and
+`agent_turn` (the chatbot <-> tools graph from agent.py). Each reports
+throughput, p50/p95 latency, peak Python heap (tracemalloc) and model and
+embedding call counts, and is written to `--output` as JSON.
+
+The run is compared against `--baseline` (by default the committed
+`bench_baseline.json` next to this script, recorded with the default
+options). A scenario regresses if it makes more model or embedding calls
+than in the baseline; a scenario missing from the baseline fails too. Those
+counts are deterministic, whereas timings and memory vary from run to run
+and machine to machine, so their changes are only reported, unless
+`--timing-threshold` is given: then a latency or peak memory growing, or
+throughput dropping, by more than that fraction fails as well (keep it
+loose, e.g. 1.0, and re-record the baseline on the machine that checks).
+The exit status is 1 on any regression, and 2 if the baseline is missing or
+was recorded with different `--units`/`--repeat`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from html import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "data_parsing"))
+
+# The offline stand-ins have to be selected before agent_tools is imported
+os.environ["SWGOH_EMBEDDINGS"] = "hashing"
+os.environ["SWGOH_VECTOR_BACKEND"] = "numpy"
+os.environ.pop("SWGOH_EMBEDDING_MODEL", None)
+
+import pyarrow.parquet as pq  # noqa: E402
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+from langchain_core.language_models.fake_chat_models import FakeListChatModel, FakeMessagesListChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+
+ROSTER = os.path.join(os.path.dirname(__file__), "../data/swgoh_units.parquet")
+BASELINE = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+QUERIES = [
+    "Galactic Republic Leader",
+    "Jedi with Omicrons",
+    "Dark Side Attacker",
+    "healer that cleanses debuffs",
+    "tank that taunts and gains protection",
+    "Bounty Hunter who steals turn meter",
+    "Rebel Support with Zeta",
+    "who can revive fallen allies",
+]
+ABILITY_CLASSES = ["AoE", "Assist", "Counter", "Dispel", "Heal", "Revive", "Stealth", "Taunt", "Turn Meter Gain",
+                   "Speed Up", "Cleanse", "Ability Block", "Stun", "Buff Immunity"]
+# Lower is better for these; throughput is the one metric where higher is better
+COST_METRICS = ["p50_ms", "p95_ms", "peak_mb"]
+CALL_METRICS = ["llm_calls", "embedding_calls"]
+
+
+class CallCounter(BaseCallbackHandler):
+    """Counts chat model calls made by the models it is attached to."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.calls += 1
+
+
+class CountingEmbeddings(Embeddings):
+    """Wraps an embedding model and counts the texts sent to it."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.model = embeddings.model
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self.embeddings.embed_query(text)
+
+
+def render_unit_page(unit):
+    """A unit page in swgoh.gg's markup, with stats and abilities derived deterministically from the unit."""
+    rng = random.Random(zlib.crc32(unit['character_url'].encode('utf-8')))
+    tags = list(unit['tags'])
+    stats = {
+        'Power': f"{rng.randint(20000, 45000):,}", 'Health': f"{rng.randint(30000, 120000):,}",
+        'Protection': f"{rng.randint(20000, 150000):,}", 'Speed': str(rng.randint(120, 350)),
+        'Critical Damage': f"{rng.choice([150, 200, 250])}%", 'Potency': f"{rng.uniform(20, 120):.2f}%",
+        'Tenacity': f"{rng.uniform(20, 120):.2f}%", 'Physical Damage': f"{rng.randint(2000, 9000):,}",
+        'Special Damage': f"{rng.randint(2000, 9000):,}", 'Armor': f"{rng.uniform(10, 50):.2f}%",
+    }
+    classes = sorted(rng.sample(ABILITY_CLASSES, 4))
+    faction = next((t for t in tags if t not in ("Light Side", "Dark Side", "Neutral", "Leader", "Attacker",
+                                                  "Support", "Tank", "Healer")), tags[0])
+    abilities = [("basicability", "Strike", f"Deal Physical damage to target enemy and inflict {classes[0]}.", ""),
+                 ("specialability", "Barrage", f"Deal Special damage to all enemies. {faction} allies gain "
+                                               f"{classes[1]} for 2 turns.", "Zeta"),
+                 ("uniqueability", "Resolve", f"This unit gains {classes[2]} whenever a {faction} ally is "
+                                              f"defeated, and {rng.randint(10, 50)}% Turn Meter.", "Omicron")]
+    if "Leader" in tags:
+        abilities.append(("leaderability", "Command", f"{faction} allies gain {rng.randint(10, 40)}% Max Health "
+                                                      f"and {classes[3]} at the start of battle.", "Zeta"))
+
+    stat_rows = "".join(
+        f'<div class="stat-table-data__entry"><span class="stat-table-data__entry-primary-label">{label}</span>'
+        f'<span class="stat-table-data__entry-primary-value">{value}</span></div>' for label, value in stats.items())
+    class_links = "".join(f'<a href="/search/?q={escape(c)}">{escape(c)}</a>' for c in classes)
+    ability_cards = "".join(
+        f'<div class="unit-ability"><div class="unit-ability__header">'
+        f'<div class="unit-ability__name"><a href="/units/x/{marker}/">{escape(name)}</a></div>'
+        f'<div class="unit-ability__header-aside">'
+        + (f'<span title="{badge} ability"></span>' if badge else "") +
+        f'</div></div><div class="unit-ability__description">{escape(description)}</div></div>'
+        for marker, name, description, badge in abilities)
+    return (f"<html><head><title>{escape(unit['name'])}</title></head><body>"
+            f"<div class='stat-table-data'>{stat_rows}</div>"
+            f"<h4>Ability Classes</h4><div>{class_links}</div>"
+            f"{ability_cards}</body></html>")
+
+
+def write_fixtures(units, directory):
+    """Writes one page per unit in mirror layout (`units/<slug>/index.html`); returns their relative paths."""
+    paths = []
+    for unit in units:
+        path = unit['character_url'].split("swgoh.gg/", 1)[-1].strip("/") + "/index.html"
+        os.makedirs(os.path.join(directory, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(directory, path), 'w', encoding='utf-8') as f:
+            f.write(render_unit_page(unit))
+        paths.append(path)
+    return paths
+
+
+def measure(name, operations, repeat=1, counters=()):
+    """
+    Runs each callable in `operations`, `repeat` times over, under
+    tracemalloc. Returns the scenario's metrics.
+    """
+    before = [counter.calls for counter in counters]
+    latencies = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for operation in operations:
+            op_start = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - op_start)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls = [counter.calls - b for counter, b in zip(counters, before)]
+    result = {
+        "operations": len(latencies),
+        "ops_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "peak_mb": round(peak / 1e6, 2),
+        "llm_calls": calls[0] if calls else 0,
+        "embedding_calls": calls[1] if len(calls) > 1 else 0,
+    }
+    print(f"{name:>24}: {result['ops_per_s']:9.1f} ops/s | p50 {result['p50_ms']:8.2f} ms | "
+          f"p95 {result['p95_ms']:8.2f} ms | peak {result['peak_mb']:7.1f} MB | "
+          f"{result['llm_calls']} LLM / {result['embedding_calls']} embedding calls")
+    return result
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def scripted_agent_model(counter):
+    """A chat model that searches, fetches the first results in one batch, then answers, in a loop."""
+    responses = [
+        AIMessage("", tool_calls=[{"name": "find_relevant_units", "args": {"query": "Galactic Republic Leader"},
+                                   "id": "call-search"}]),
+        AIMessage("", tool_calls=[{"name": "get_characters_data", "args": {"characters": ["Mace Windu", "Jedi"]},
+                                   "id": "call-fetch"}]),
+        AIMessage("Lead with the strongest Galactic Republic leader and fill the squad with Jedi support."),
+    ]
+    return FakeMessagesListChatModel(responses=responses, callbacks=[counter])
+
+
+def run(data_dir, units_limit, html_dir, repeat):
+    from agent_tools import embeddings as embeddings_module
+    from agent_tools import rag_tool
+    from agent_tools.registry import registry
+    from character_page import parse_character_details, parse_character_page
+    from local_server import serve_saved_pages
+    from parquet_utils import save_character_details
+
+    # Point every artifact at the scratch directory
+    units = pq.read_table(ROSTER)
+    if units_limit:
+        units = units.slice(0, units_limit)
+    pq.write_table(units, os.path.join(data_dir, "swgoh_units.parquet"))
+    registry.data_path = data_dir
+    rag_tool.vectordb_path = registry.path(os.path.basename(rag_tool.vectordb_path))
+    rag_tool.manifest_path = os.path.join(rag_tool.vectordb_path, "index_manifest.json")
+
+    llm_counter = CallCounter()
+    registry.artifact("summarizer_llm")(lambda registry: FakeListChatModel(
+        responses=["Deals damage, applies the listed effects and supports allies of its faction."],
+        callbacks=[llm_counter]))
+    embedder = CountingEmbeddings(embeddings_module.create_embeddings("hashing"))
+    embeddings_module.create_embeddings = lambda provider, model=None: embedder
+    counters = (llm_counter, embedder)
+    results = {}
+
+    # 1. Page parsing, over HTTP from the local fixture server
+    rows = units.to_pylist()
+    if html_dir is None:
+        html_dir = os.path.join(data_dir, "html")
+        paths = write_fixtures(rows, html_dir)
+    else:
+        paths = [os.path.relpath(p, html_dir) for p in sorted(
+            os.path.join(root, f) for root, _, files in os.walk(html_dir) for f in files if f == "index.html")]
+    server, base_url = serve_saved_pages(html_dir)
+    try:
+        import requests
+        session = requests.Session()
+        page_urls = [f"{base_url}/{os.path.dirname(p)}/" for p in paths]
+        results["parse_character_details"] = measure(
+            "parse_character_details", [lambda url=url: parse_character_details(url, session) for url in page_urls],
+            repeat, counters)
+    finally:
+        server.shutdown()
+
+    details = []
+    for path in paths:
+        with open(os.path.join(html_dir, path), encoding='utf-8') as f:
+            details.append(parse_character_page(f.read(), "https://swgoh.gg/" + os.path.dirname(path) + "/"))
+    save_character_details([d for d in details if d], data_dir)
+
+    # 2. Summaries, embeddings, vector store and hybrid index from nothing
+    results["index_build"] = measure("index_build", [lambda: registry.get("hybrid_index")], 1, counters)
+
+    # 3. Retrieval with empty query and result caches on every pass
+    def cold_search(query):
+        registry.get("result_cache").clear()
+        registry.get("query_embedding_cache").clear()
+        rag_tool.find_relevant_units.invoke({"query": query})
+
+    results["find_relevant_units"] = measure(
+        "find_relevant_units", [lambda q=q: cold_search(q) for q in QUERIES], repeat, counters)
+
+    # 4. Unit payload lookups, including the first-load index build
+    from agent_tools.character_data import get_character_data
+    urls = [row['character_url'] for row in rows]
+    results["get_character_data"] = measure(
+        "get_character_data", [lambda url=url: get_character_data.invoke({"character_url": url}) for url in urls],
+        repeat, counters)
+
+    # 5. Full agent turns: search, batch fetch, answer
+    from agent_tools.character_data import get_characters_data
+    from graph import build_agent
+    agent = build_agent(scripted_agent_model(llm_counter),
+                        [rag_tool.find_relevant_units, get_character_data, get_characters_data])
+
+    def turn():
+        registry.get("result_cache").clear()
+        asyncio.run(agent.ainvoke({"messages": [("user", "Who should lead a Galactic Republic team?")]}))
+
+    results["agent_turn"] = measure("agent_turn", [turn] * 5, repeat, counters)
+    return results
+
+
+def compare(results, baseline, timing_threshold=None):
+    """
+    Compares `results` against `baseline`. Returns `(regressions, changes)`:
+    regression messages, and the timing and memory changes for information.
+    Timings only count as regressions with a `timing_threshold`.
+    """
+    regressions, changes = [], []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            regressions.append(f"{name}: no baseline; re-record it with --save-baseline")
+            continue
+        for metric in CALL_METRICS:
+            if current[metric] > previous.get(metric, 0):
+                regressions.append(f"{name}: {metric} {previous.get(metric, 0)} -> {current[metric]}")
+        for metric in COST_METRICS + ["ops_per_s"]:
+            if not previous.get(metric) or not current[metric]:
+                continue
+            # Relative slowdown: growth for latency and memory, drop for throughput
+            ratio = current[metric] / previous[metric]
+            slowdown = 1 / ratio - 1 if metric == "ops_per_s" else ratio - 1
+            message = f"{name}: {metric} {previous[metric]} -> {current[metric]} ({ratio - 1:+.0%})"
+            changes.append(message)
+            if timing_threshold is not None and slowdown > timing_threshold:
+                regressions.append(message)
+    return regressions, changes
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--units", type=int, default=60, help="Units from the roster to include (0 for all)")
+    arg_parser.add_argument("--html-dir", help="Saved unit pages (units/<slug>/index.html) instead of fixtures")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Passes over each scenario's operations")
+    arg_parser.add_argument("--output", default="bench_results.json", help="Where to write the results")
+    arg_parser.add_argument("--baseline", default=BASELINE, help="Results to compare against")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    arg_parser.add_argument("--timing-threshold", type=float,
+                            help="Also fail on a relative slowdown above this (timings are only reported by default)")
+    args = arg_parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="swgoh-bench-")
+    try:
+        results = run(data_dir, args.units, args.html_dir, args.repeat)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "units": args.units,
+              "repeat": args.repeat, "scenarios": results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    else:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; record one with --save-baseline")
+            sys.exit(2)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get("units"), baseline.get("repeat")) != (args.units, args.repeat):
+            print(f"{args.baseline} was recorded with --units {baseline.get('units')} --repeat "
+                  f"{baseline.get('repeat')}; run with the same options or re-record it")
+            sys.exit(2)
+        regressions, changes = compare(results, baseline["scenarios"], args.timing_threshold)
+        if changes:
+            print(f"Timings against {args.baseline}:")
+            for change in changes:
+                print(f"  {change}")
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
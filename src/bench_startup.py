@@ -0,0 +1,64 @@
+"""
+Benchmarks agent cold start: module import times and first-load time of each
+registry artifact.
+
+    python bench_startup.py --repeat 5
+    python bench_startup.py --artifacts units payload_index vectorstore
+
+Imports are timed in fresh interpreters so nothing is cached between runs.
+Artifacts are then loaded in this process in the order given, so each time
+excludes the artifacts it depends on that were loaded before it.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ["agent_tools", "model", "agent"]
+
+
+def time_import(module, repeat=1):
+    """Median wall time, in seconds, to import `module` in a fresh interpreter."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if result.returncode != 0:
+            # The exception line is the last unindented line of the traceback
+            return None, [line for line in result.stderr.splitlines() if line and not line[0].isspace()][-1]
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples), None
+
+
+def time_artifacts(names):
+    """Loads each artifact once; yields (name, seconds, error)."""
+    from agent_tools.registry import registry
+    for name in names:
+        start = time.perf_counter()
+        try:
+            registry.get(name)
+        except Exception as e:
+            yield name, None, e
+        else:
+            yield name, time.perf_counter() - start, None
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Fresh-interpreter imports per module")
+    arg_parser.add_argument("--modules", nargs="*", default=MODULES, help="Modules to time the import of")
+    arg_parser.add_argument("--artifacts", nargs="*",
+                            default=["units", "details", "abilities", "payload_index", "compact_index", "hybrid_index"],
+                            help="Registry artifacts to time the first load of")
+    args = arg_parser.parse_args()
+
+    print("Import time (median of fresh interpreters)")
+    for module in args.modules:
+        seconds, error = time_import(module, args.repeat)
+        print(f"{module:>20}: " + (f"{seconds * 1000:8.1f} ms" if error is None else f"failed ({error})"))
+
+    print("First load")
+    import agent_tools  # noqa: F401  (registers every artifact)
+    for name, seconds, error in time_artifacts(args.artifacts):
+        print(f"{name:>20}: " + (f"{seconds * 1000:8.1f} ms" if error is None else f"failed ({error})"))
@@ -0,0 +1,103 @@
+"""
+Benchmarks the vector store backends on a synthetic corpus.
+
+    python bench_vector_store.py --docs 300 --dim 3072 --queries 200
+    python bench_vector_store.py --docs 50000 --dim 768 --ann-lists 256
+
+Each backend runs in a fresh interpreter and reports build time, top-k query
+latency (by vector, so embedding cost is excluded), batched query throughput
+for the numpy backend, and the process's peak resident memory. Vectors are
+random; the corpus is only there to size the stores.
+"""
+import argparse
+import hashlib
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKENDS = ["numpy", "chroma"]
+
+
+class RandomEmbeddings:
+    """Unit-length random vectors, seeded by text, so both backends index the same data."""
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    def _vector(self, text):
+        import numpy as np
+        rng = np.random.default_rng(int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16))
+        vector = rng.standard_normal(self.dim).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+def open_store(backend, directory, embeddings, ann_lists):
+    if backend == "numpy":
+        from agent_tools.vector_store import NumpyVectorStore
+        return NumpyVectorStore(directory, embeddings, ann_lists=ann_lists)
+    from langchain_chroma import Chroma
+    return Chroma(persist_directory=directory, embedding_function=embeddings)
+
+
+def run(backend, docs, dim, queries, k, ann_lists):
+    from langchain_core.documents import Document
+
+    embeddings = RandomEmbeddings(dim)
+    directory = tempfile.mkdtemp()
+    try:
+        store = open_store(backend, directory, embeddings, ann_lists)
+        documents = [Document(page_content=f"unit {i}", metadata={"url": f"u{i}"}) for i in range(docs)]
+        start = time.perf_counter()
+        for i in range(0, docs, 1000):
+            batch = documents[i:i + 1000]
+            store.add_documents(batch, ids=[d.metadata["url"] for d in batch])
+        build = time.perf_counter() - start
+
+        query_vectors = [embeddings.embed_query(f"query {i}") for i in range(queries)]
+        store.similarity_search_by_vector(query_vectors[0], k=k)  # warm-up
+        start = time.perf_counter()
+        for vector in query_vectors:
+            store.similarity_search_by_vector(vector, k=k)
+        latency = (time.perf_counter() - start) / queries
+
+        line = f"{backend:>8}: build {build:7.2f} s | query {latency * 1e3:8.3f} ms"
+        if hasattr(store, "similarity_search_batch"):
+            texts = [f"query {i}" for i in range(queries)]
+            start = time.perf_counter()
+            store.similarity_search_batch(texts, k=k)
+            line += f" | batched {queries / (time.perf_counter() - start):9.0f} queries/s"
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(line + f" | peak RSS {peak_mb:7.1f} MB")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--backend", choices=BACKENDS, help="Run a single backend in this process")
+    arg_parser.add_argument("--docs", type=int, default=300, help="Documents in the corpus")
+    arg_parser.add_argument("--dim", type=int, default=3072, help="Embedding dimension")
+    arg_parser.add_argument("--queries", type=int, default=200, help="Queries to time")
+    arg_parser.add_argument("--k", type=int, default=30, help="Results per query")
+    arg_parser.add_argument("--ann-lists", type=int, default=None, help="IVF clusters for the numpy backend")
+    args = arg_parser.parse_args()
+
+    if args.backend:
+        run(args.backend, args.docs, args.dim, args.queries, args.k, args.ann_lists)
+    else:
+        print(f"Corpus: {args.docs} documents x {args.dim} dimensions, top-{args.k}")
+        for backend in BACKENDS:
+            # A fresh interpreter per backend keeps peak memory figures separate
+            cmd = [sys.executable, __file__, "--backend", backend] + sys.argv[1:]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            output = result.stdout.rstrip() or result.stderr.strip().splitlines()[-1]
+            print(output)
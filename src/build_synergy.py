@@ -0,0 +1,46 @@
+"""
+Precomputes the team synergy index used by the `suggest_team` tool.
+
+    python build_synergy.py
+    python build_synergy.py --show "Jedi Master Kenobi"
+
+Reads swgoh_units.parquet and character_abilities.parquet and writes
+team_synergy.json to the data directory: a tag co-occurrence graph, the
+factions and units each leader ability refers to, ranked candidate teammates
+per unit and a suggested squad per leader. The index records the data
+version it was built from; the agent rebuilds it on first use if the data
+has changed since.
+"""
+import argparse
+import json
+import os
+import time
+
+from agent_tools.registry import registry
+from agent_tools.team_synergy import SYNERGY_FILE, build_synergy, save_synergy, suggest_team
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--data-path", default=registry.data_path, help="Directory holding the parquet files")
+    arg_parser.add_argument("--show", nargs="*", default=[], help="Leaders to print a suggested squad for")
+    args = arg_parser.parse_args()
+
+    registry.data_path = args.data_path
+    start = time.perf_counter()
+    synergy = build_synergy(registry.get("units"), registry.get("abilities"))
+    path = registry.path(SYNERGY_FILE)
+    save_synergy(synergy, path, registry.data_version())
+    leaders = sum(1 for entry in synergy['units'].values() if entry['references'])
+    print(f"Built synergy for {len(synergy['units'])} units ({leaders} leaders referencing factions) "
+          f"in {time.perf_counter() - start:.2f} s; {os.path.getsize(path) / 1e3:.0f} kB written to {path}")
+
+    for leader in args.show:
+        result = suggest_team.invoke({"leader": leader})
+        try:
+            result = json.loads(result)
+        except ValueError:
+            print(result)
+            continue
+        print(f"\n{leader} (references: {', '.join(result['leader_references']) or 'none'})")
+        for unit in result['squad']:
+            print(f"  {unit['name']:<32} {', '.join(unit['tags'])}")
@@ -1,23 +1,29 @@
 from langchain_core.messages import SystemMessage
 from langgraph.graph.message import add_messages
 from typing import TypedDict, Annotated
-from model import llm_with_tools
+from context_budget import ContextBudget
+from telemetry import emit
 
 
 SYSTEM_PROMPT = """You are a Star Wars Galaxy of Heroes assistant. 
-Your goal is to provide accurate character data from the provided tools. Don't be afraid to use tools multiple times, especially when having to consider multiple characters.
+Your goal is to provide accurate character data from the provided tools. Don't be afraid to use tools multiple times, but fetch several characters in a single call whenever you can.
 Only answer with the data provided by the tools. Do not make up any data.
 
 TOOL USAGE RULES:
 1. Use 'find_relevant_units' to get a list of characters and their tags. Use this as a guide to choose appropriate characters to answer the user's question.
-2. Use 'get_character_data' with that EXACT URL to fetch stats and abilities for a character.
+2. Use 'query_roster' for questions about the whole roster that filter or rank by tags, ability classes, stats or Zeta/Omicron/Ultimate abilities (e.g. "fastest Dark Side attackers", "Galactic Legends by health"). One call replaces fetching units one by one.
+3. Use 'suggest_team' with a leader's name for team-building questions. It returns a precomputed 5-unit squad and bench based on the factions the leader's ability references; verify the squad with 'get_characters_data' rather than searching unit by unit.
+4. Use 'find_character' when the user mentions a character by a partial name, nickname (e.g. "JMK", "SLKR") or misspelling, to get the matching characters and their URLs.
+5. Use 'get_characters_data' with a list of URLs (or names) to fetch stats and abilities for ALL the characters you are considering in one call.
+6. Use 'get_character_data' with a URL (or name) only when you need the full record of a single character, including 'player_data_url' and ability breakdown links.
+7. If a tool says a name is ambiguous, ask the user which of the candidates they meant.
 
 INTERPRETATION RULES:
 - Remember that team sizes are limited to 5 characters.
 - Battles are limited to 5 minutes.
-- Zetas and Omicrons are elite upgrades. If 'is_zeta' is True, identify it as a Zeta ability. Likewise for 'is_omicron'.
+- Zetas and Omicrons are elite upgrades. An ability is a Zeta ability if its 'is_zeta' is True or its 'flags' contain 'zeta'. Likewise for Omicron ('is_omicron' or 'omicron') and Ultimate ('is_ultimate' or 'ultimate').
 - Always provide the 'mods_data_url' if the user asks for modding advice.
-- Query as many characters as needed to answer the user's question. Pay particular attention to tags to maximize synergy.
+- Query as many characters as needed to answer the user's question. Pay particular attention to tags to maximize synergy; start team questions from 'suggest_team'.
 - Be concise but stay in character as a helpful tactical droid."""
 
 
@@ -26,13 +32,28 @@ class State(TypedDict):
     messages: Annotated[list, add_messages]
 
 
-def chatbot(state: State):
-    """The node that calls the LLM with a system prompt"""
-    # Prepend the system prompt to the existing conversation history
-    messages = [SystemMessage(content=SYSTEM_PROMPT)] + state["messages"]
-    
-    # Invoke the model with the augmented message list
-    response = llm_with_tools.invoke(messages)
-    
-    # Return the response to be added to the state
-    return {"messages": [response]}
\ No newline at end of file
+def make_chatbot(llm_with_tools, budget=None):
+    """
+    Builds the chatbot node around a (tool-bound) chat model. The history is
+    compacted by `budget` (a `ContextBudget`) before every call.
+    """
+    budget = budget or ContextBudget()
+
+    async def chatbot(state: State):
+        """The node that calls the LLM with a system prompt"""
+        # Compact older tool output so the prompt doesn't grow with the session
+        history, report = budget.compact(state["messages"])
+        if report["saved"]:
+            emit("context", "compact", **report)
+
+        # Prepend the system prompt to the existing conversation history
+        messages = [SystemMessage(content=SYSTEM_PROMPT)] + history
+        
+        # Invoke the model asynchronously so the event loop keeps serving other
+        # sessions; under stream_mode="messages" LangGraph streams its tokens
+        response = await llm_with_tools.ainvoke(messages)
+        
+        # Return the response to be added to the state
+        return {"messages": [response]}
+
+    return chatbot
\ No newline at end of file
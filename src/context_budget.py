@@ -0,0 +1,130 @@
+import json
+import re
+from langchain_core.messages import HumanMessage, ToolMessage
+
+# Question words that mean the model still needs a unit's stats or mods link
+STAT_WORDS = re.compile(r"\b(stat|stats|speed|health|protection|damage|potency|tenacity|armor|resistance|crit\w*|"
+                        r"offense|defen[cs]e|mods?|modding)\b", re.I)
+MOD_WORDS = re.compile(r"\bmod(s|ding)?\b", re.I)
+RAG_URL_RE = re.compile(r"^Character URL: .*$", re.M)
+
+
+def estimate_tokens(text):
+    """Rough token count: about four characters per token for English and JSON."""
+    return len(text) // 4 + 1
+
+
+def _text(message):
+    content = message.content
+    return content if isinstance(content, str) else json.dumps(content)
+
+
+def _with_content(message, content):
+    return message.model_copy(update={"content": content})
+
+
+class ContextBudget:
+    """
+    Keeps the prompt sent to the model roughly flat as a session grows.
+
+    The checkpointed history is never modified; `compact()` returns a lighter
+    copy for one model call:
+
+    1. Character records that appear again in a later tool result are dropped
+       from the earlier one, so each unit's data is in the prompt once.
+    2. Tool results from earlier turns are projected to the fields the current
+       question needs: names, URLs, tags, ability classes and ability names
+       always; stats only if the question asks about stats or mods. Search
+       results from earlier turns keep each unit's name, tags and URL.
+    3. If the prompt is still over `max_tokens`, the oldest tool results are
+       replaced by a placeholder until it fits; the latest turn is kept.
+    """
+
+    def __init__(self, max_tokens=24000):
+        self.max_tokens = max_tokens
+
+    def compact(self, messages):
+        """Returns `(messages, report)`, where `report` has `before`, `after` and `saved` token estimates."""
+        before = sum(estimate_tokens(_text(m)) for m in messages)
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        question = _text(messages[last_human]) if messages else ""
+
+        messages = self._dedupe(messages)
+        messages = [self._project(m, question) if i < last_human and isinstance(m, ToolMessage) else m
+                    for i, m in enumerate(messages)]
+
+        total = sum(estimate_tokens(_text(m)) for m in messages)
+        for i in range(last_human):
+            if total <= self.max_tokens:
+                break
+            if isinstance(messages[i], ToolMessage):
+                placeholder = f"[Output of {messages[i].name or 'tool'} omitted to save context; call it again if needed]"
+                total += estimate_tokens(placeholder) - estimate_tokens(_text(messages[i]))
+                messages[i] = _with_content(messages[i], placeholder)
+
+        return messages, {"before": before, "after": total, "saved": before - total}
+
+    def _dedupe(self, messages):
+        """Drops character records from tool results when a later tool result repeats them."""
+        seen = set()
+        result = list(messages)
+        for i in range(len(result) - 1, -1, -1):
+            message = result[i]
+            records = _character_records(message)
+            if records is None:
+                continue
+            kept = [r for r in records if r.get('character_url') not in seen]
+            seen.update(r['character_url'] for r in records if r.get('character_url'))
+            if len(kept) == len(records):
+                continue
+            if kept:
+                result[i] = _with_content(message, json.dumps(kept if len(kept) > 1 else kept[0], separators=(',', ':')))
+            else:
+                result[i] = _with_content(message, "[Character data repeated later in the conversation]")
+        return result
+
+    def _project(self, message, question):
+        records = _character_records(message)
+        if records is not None:
+            projected = [_project_record(r, question) for r in records]
+            return _with_content(message, json.dumps(projected if len(projected) > 1 else projected[0], separators=(',', ':')))
+        if message.name == "find_relevant_units":
+            # Keep "Character: ...", "Tags: ..." and the URL of each result
+            blocks = _text(message).split("\n\n---\n\n")
+            summaries = []
+            for block in blocks:
+                lines = block.replace("Content: ", "", 1).splitlines()
+                url = RAG_URL_RE.search(block)
+                summaries.append("\n".join(lines[:2] + ([url.group(0)] if url else [])))
+            return _with_content(message, "\n\n".join(summaries))
+        return message
+
+
+def _character_records(message):
+    """The character records in a character-data tool result, or None if it isn't one."""
+    if not isinstance(message, ToolMessage) or not isinstance(message.content, str):
+        return None
+    if not message.content.startswith(("{", "[")):
+        return None
+    try:
+        data = json.loads(message.content)
+    except ValueError:
+        return None
+    records = data if isinstance(data, list) else [data]
+    # Batched lookups may mix in {"query", "error"} entries for unknown names
+    if not all(isinstance(r, dict) for r in records) or not any('character_url' in r for r in records):
+        return None
+    return records
+
+
+def _project_record(record, question):
+    if 'character_url' not in record:
+        return record
+    wants_stats = bool(STAT_WORDS.search(question))
+    projected = {k: record[k] for k in ('name', 'character_url', 'tags', 'ability_classes') if k in record}
+    if wants_stats and 'base_stats' in record:
+        projected['base_stats'] = record['base_stats']
+    if MOD_WORDS.search(question) and 'mods_data_url' in record:
+        projected['mods_data_url'] = record['mods_data_url']
+    projected['abilities'] = [a.get('name') or a.get('ability_name') for a in record.get('abilities', [])]
+    return projected
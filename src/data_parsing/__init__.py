@@ -1,3 +1,6 @@
 from .character_fetcher import get_swgoh_characters
-from .character_page import parse_character_details
-from .parquet_utils import save_to_parquet
\ No newline at end of file
+from .character_page import parse_character_details, parse_character_page
+from .crawler import Crawler
+from .http_cache import HttpCache
+from .parquet_utils import (save_character_details, save_to_parquet, upsert_character_details,
+                            upsert_parquet, upsert_parquet_groups)
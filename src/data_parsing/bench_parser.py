@@ -0,0 +1,67 @@
+"""
+Benchmarks `parse_character_page` over a corpus of saved character pages.
+
+    python bench_parser.py ../../data/html_archive --repeat 3
+
+Reports pages/second and peak Python heap usage (via tracemalloc) for each
+available tree builder.
+"""
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+import character_page
+from character_page import parse_character_page
+
+
+def load_corpus(directory):
+    """Reads every saved .html page under `directory` into memory."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "**", "*.html"), recursive=True)):
+        with open(path, encoding='utf-8') as f:
+            pages.append((path, f.read()))
+    return pages
+
+
+def run(pages, repeat=1):
+    """Parses the corpus `repeat` times; returns (pages_per_second, peak_bytes, failures)."""
+    failures = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for path, html in pages:
+            if parse_character_page(html, path) is None:
+                failures += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(pages) * repeat / elapsed, peak, failures
+
+
+def available_parsers():
+    parsers = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.insert(0, 'lxml')
+    except ImportError:
+        pass
+    return parsers
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("directory", help="Directory of saved character pages (*.html, searched recursively)")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per tree builder")
+    args = arg_parser.parse_args()
+
+    pages = load_corpus(args.directory)
+    if not pages:
+        raise SystemExit(f"No .html files found under {args.directory}")
+    print(f"Corpus: {len(pages)} pages, {sum(len(h) for _, h in pages) / 1e6:.1f} MB")
+
+    for builder in available_parsers():
+        character_page.HTML_PARSER = builder
+        pages_per_sec, peak, failures = run(pages, args.repeat)
+        print(f"{builder:>12}: {pages_per_sec:8.1f} pages/s | peak memory {peak / 1e6:7.1f} MB | {failures} failures")
@@ -1,21 +1,49 @@
 import cloudscraper
 from bs4 import BeautifulSoup
 import pandas as pd
+from http_cache import Page
 
-def get_swgoh_characters():
+CHARACTERS_URL = "https://swgoh.gg/characters/"
+
+
+def get_swgoh_characters(cache=None):
+    """
+    Fetches the character list page and parses it.
+    With an `HttpCache` the request is conditional, and an empty list is
+    returned when the page hasn't changed since it was last fetched. A changed
+    page is only staged in the cache: call `cache.commit(CHARACTERS_URL)` once the
+    parsed list has been saved.
+    """
     scraper = cloudscraper.create_scraper(
         browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True}
     )
 
-    url = "https://swgoh.gg/characters/"
+    url = CHARACTERS_URL
 
     try:
-        response = scraper.get(url)
-        if response.status_code != 200:
-            print(f"Blocked or error: {response.status_code}")
+        if cache is not None:
+            page = cache.fetch(lambda u, headers: scraper.get(u, headers=headers), url)
+        else:
+            response = scraper.get(url)
+            page = Page(url, response.status_code, response.text, True)
+        if page.status_code != 200:
+            print(f"Blocked or error: {page.status_code}")
             return None
+        if not page.changed:
+            print("Character list unchanged since last fetch.")
+            return []
+
+        return parse_characters_page(page.text)
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+
+
+def parse_characters_page(html):
+    """Parses the HTML of the character list page into a list of unit dictionaries."""
+    try:
+        soup = BeautifulSoup(html, 'html.parser')
         char_cells = soup.find_all('div', class_='unit-card-grid__cell')
         
         characters = []
@@ -67,12 +95,17 @@ def get_swgoh_characters():
 
 if __name__ == "__main__":
     import os
-    from parquet_utils import save_to_parquet
+    from http_cache import HttpCache
+    from parquet_utils import upsert_parquet
 
     data_path = os.path.join(os.path.dirname(__file__), "../../data")
-    # 1. Fetch the data using your cloudscraper method
-    data = get_swgoh_characters()
+    # 1. Fetch the data using your cloudscraper method, skipping the parse if
+    # the page is unchanged since the last run
+    cache = HttpCache(os.path.join(data_path, "http_cache"))
+    data = get_swgoh_characters(cache=cache)
     
-    # 2. Save it
-    if data:
-        save_to_parquet(data, os.path.join(data_path, "swgoh_units.parquet"))
\ No newline at end of file
+    # 2. Save only the rows that changed; the page only counts as seen once
+    # they are written, so a failed save is retried on the next run
+    if data and upsert_parquet(data, os.path.join(data_path, "swgoh_units.parquet")) is not None:
+        cache.commit(CHARACTERS_URL)
+        cache.save()
@@ -1,97 +1,98 @@
-import cloudscraper
 from bs4 import BeautifulSoup
 import re
-from parquet_utils import save_to_parquet
+import soupsieve as sv
+from crawler import create_scraper
+
+# Prefer the C-backed lxml tree builder; fall back to the pure-Python one
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Selectors are compiled once at import rather than on every page
+PAGE_ELEMENTS = sv.compile('.stat-table-data__entry, h4, .unit-ability__header, .unit-ability__description')
+STAT_LABEL = sv.compile('.stat-table-data__entry-primary-label')
+STAT_VALUE = sv.compile('.stat-table-data__entry-primary-value')
+ABILITY_NAME = sv.compile('.unit-ability__name')
+ABILITY_ASIDE = sv.compile('div.unit-ability__header-aside')
+ABILITY_CLASSES_RE = re.compile(r'Ability Classes', re.I)
+ABILITY_TYPES = [
+    ('basicability', 'Basic'),
+    ('specialability', 'Special'),
+    ('uniqueability', 'Unique'),
+    ('leaderability', 'Leader'),
+    ('ultimateability', 'Ultimate'),
+]
+
+def parse_character_details(character_url, scraper=None):
+    """
+    Fetches a single character page and parses it.
+    Pass a shared `scraper` to reuse its session; the batch job uses `Crawler` instead.
+    """
+    if scraper is None:
+        scraper = create_scraper()
 
-def parse_character_details(character_url):
-    scraper = cloudscraper.create_scraper(
-        browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True}
-    )
-    
-    base_url = character_url.rstrip('/')
-    
     try:
-        response = scraper.get(base_url + "/")
+        response = scraper.get(character_url.rstrip('/') + "/")
         if response.status_code != 200:
             return None
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
+        return parse_character_page(response.text, character_url)
+    except Exception as e:
+        print(f"Error fetching {character_url}: {e}")
+        return None
+
+
+def parse_character_page(html, character_url):
+    """
+    Parses the HTML of a character page into a details dictionary.
+
+    The document is walked once with a single compiled selector that matches
+    every element we care about, in document order. Each ability description is
+    paired with the ability header that precedes it rather than by position.
+    """
+    base_url = character_url.rstrip('/')
+
+    try:
+        soup = BeautifulSoup(html, HTML_PARSER)
         
         # 1. Predictable URL Construction
         mods_data_url = f"{base_url}/data/mods/?filter_type=guilds_100_gp"
         player_data_url = f"{base_url}/data/stats/?filter_type=guilds_100_gp"
 
-        # 2. Extract Stats
-        # In eg_char.html, stats are in 'unit-stat-row' within the summary or sidebars
         base_stats = {}
-        for row in soup.select('.stat-table-data__entry'):
-            label = row.select_one('.stat-table-data__entry-primary-label')
-            value = row.select_one('.stat-table-data__entry-primary-value')
-            if label and value:
-                base_stats[label.get_text(strip=True)] = value.get_text(strip=True)
-
-        # 3. Extract Ability Classes (the global list for the character)
         ability_classes = []
-        ac_header = soup.find('h4', string=re.compile(r'Ability Classes', re.I))
-        if ac_header:
-            # Classes are in the immediate sibling 'div' container
-            ac_container = ac_header.find_next_sibling('div')
-            if ac_container:
-                ability_classes = [a.get_text(strip=True) for a in ac_container.find_all('a')]
-
-        # 4. Extract Individual Abilities
         abilities = []
-        # Abilities are wrapped in 'list-group-item-wrapper' or 'ability-card'
-        for idx, card in enumerate(soup.select('.unit-ability__header')):
-            is_zeta = False
-            is_omicron = False
-            is_ultimate = False
-
-            name_tag = card.select_one('.unit-ability__name')
-            if not name_tag:
-                continue
-            ability_name = name_tag.get_text(strip=True)
-
-            href = name_tag.find('a')['href'] if name_tag.find('a') else None
-            if href:
-                if 'basicability' in href:
-                    ability_type = 'Basic'
-                elif 'specialability' in href:
-                    ability_type = 'Special'
-                elif 'uniqueability' in href:
-                    ability_type = 'Unique'
-                elif 'leaderability' in href:
-                    ability_type = 'Leader'
-                elif 'ultimateability' in href:
-                    ability_type = 'Ultimate'
-            
-            # Ability Description
-            desc_tag = soup.select('.unit-ability__description')[idx]
-            
-            # Badge Detection (Zeta/Omicron)
-            # These are usually span elements with specific classes
-            ability_material = card.find('div', class_='unit-ability__header-aside') if card.find('div', class_='unit-ability__header-aside') else None
-            if ability_material:
-                # Check span for Zeta/Omicron
-                for span in ability_material.find_all('span'):
-                    if 'Zeta' in span.get('title', ''):
-                        is_zeta = True
-                    elif 'Omicron' in span.get('title', ''):
-                        is_omicron = True
-
-                # Check inner div for Ultimate
-                generic_item = ability_material.find('div', class_='generic-item')
-                is_ultimate = generic_item and 'Ultimate' in generic_item.get('title', '')
-
-            abilities.append({
-                'ability_name': ability_name,
-                'ability_type': ability_type,
-                'description': desc_tag.get_text(strip=True) if desc_tag else "",
-                'breakdown_link': "https://swgoh.gg" + href,
-                'is_zeta': is_zeta,
-                'is_omicron': is_omicron,
-                'is_ultimate': is_ultimate
-            })
+        current = None
+
+        for el in PAGE_ELEMENTS.select(soup):
+            classes = el.get('class') or ()
+
+            # 2. Extract Stats
+            if 'stat-table-data__entry' in classes:
+                label = STAT_LABEL.select_one(el)
+                value = STAT_VALUE.select_one(el)
+                if label and value:
+                    base_stats[label.get_text(strip=True)] = value.get_text(strip=True)
+
+            # 3. Extract Ability Classes (the global list for the character)
+            elif el.name == 'h4':
+                if not ability_classes and ABILITY_CLASSES_RE.search(el.get_text()):
+                    # Classes are in the immediate sibling 'div' container
+                    ac_container = el.find_next_sibling('div')
+                    if ac_container:
+                        ability_classes = [a.get_text(strip=True) for a in ac_container.find_all('a')]
+
+            # 4. Extract Individual Abilities
+            elif 'unit-ability__header' in classes:
+                current = _parse_ability_header(el)
+                if current:
+                    abilities.append(current)
+
+            elif 'unit-ability__description' in classes:
+                # Descriptions belong to the closest preceding header
+                if current is not None and not current['description']:
+                    current['description'] = el.get_text(strip=True)
 
         return {
             'character_url': character_url,
@@ -106,12 +107,57 @@ def parse_character_details(character_url):
         return None
 
 
+def _parse_ability_header(card):
+    name_tag = ABILITY_NAME.select_one(card)
+    if not name_tag:
+        return None
+
+    link = name_tag.find('a', href=True)
+    href = link['href'] if link else None
+    ability_type = None
+    if href:
+        for marker, type_name in ABILITY_TYPES:
+            if marker in href:
+                ability_type = type_name
+                break
+
+    # Badge Detection (Zeta/Omicron)
+    # These are usually span elements with specific classes
+    is_zeta = False
+    is_omicron = False
+    is_ultimate = False
+    ability_material = ABILITY_ASIDE.select_one(card)
+    if ability_material:
+        # Check span for Zeta/Omicron
+        for span in ability_material.find_all('span'):
+            title = span.get('title', '')
+            if 'Zeta' in title:
+                is_zeta = True
+            elif 'Omicron' in title:
+                is_omicron = True
+
+        # Check inner div for Ultimate
+        generic_item = ability_material.find('div', class_='generic-item')
+        is_ultimate = bool(generic_item) and 'Ultimate' in generic_item.get('title', '')
+
+    return {
+        'ability_name': name_tag.get_text(strip=True),
+        'ability_type': ability_type,
+        'description': "",
+        'breakdown_link': "https://swgoh.gg" + href if href else None,
+        'is_zeta': is_zeta,
+        'is_omicron': is_omicron,
+        'is_ultimate': is_ultimate
+    }
+
+
 if __name__ == "__main__":
     import tqdm
     import pandas as pd
     import os
-    from parquet_utils import save_to_parquet
-    import time
+    from parquet_utils import upsert_character_details
+    from crawler import Crawler
+    from http_cache import HttpCache
 
     # url = "https://swgoh.gg/units/jedi-master-mace-windu/"
     # data = parse_character_details(url)
@@ -122,11 +168,37 @@ if __name__ == "__main__":
     data_path = os.path.join(os.path.dirname(__file__), "../../data")
     df_all = pd.read_parquet(os.path.join(data_path, "swgoh_units.parquet"))
 
-    character_details = []
-    for idx, row in tqdm.tqdm(df_all.iterrows(), total=df_all.shape[0], desc="Parsing characters",
-                              unit="character", unit_scale=True, unit_divisor=1, leave=True):
-        char_data = parse_character_details(row['character_url'])
-        if char_data:
-            character_details.append(char_data)
-        time.sleep(2)
-    save_to_parquet(character_details, os.path.join(data_path, "character_details.parquet"))
\ No newline at end of file
+    def handle(url, page):
+        if page.status_code != 200:
+            print(f"Skipping {url}: {page.status_code or 'no response'}")
+            return None
+        # Unchanged pages (304 or identical body) don't need re-parsing
+        if not page.changed:
+            return None
+        return parse_character_page(page.text, url)
+
+    # Polite by default: one request every two seconds on average, as before,
+    # but without serialising on each page's latency. Requests are conditional
+    # against the on-disk cache, so only updated pages are downloaded in full.
+    # A changed page is only marked as seen in the cache once its details are
+    # stored, so pages that failed to parse or were never saved (an error or
+    # an interrupted crawl) are picked up again on the next run.
+    cache = HttpCache(os.path.join(data_path, "http_cache"))
+    crawler = Crawler(max_workers=8, rate=0.5, burst=2, per_host_limit=4, cache=cache)
+    parsed = {}
+    try:
+        for url, char_data in tqdm.tqdm(crawler.crawl(df_all['character_url'], handle), total=df_all.shape[0],
+                                        desc="Parsing characters", unit="character", unit_scale=True,
+                                        unit_divisor=1, leave=True):
+            if char_data:
+                parsed[url] = char_data
+    finally:
+        crawler.close()
+
+    # Pages complete out of order; keep the roster order for new rows
+    character_details = [parsed[url] for url in df_all['character_url'] if url in parsed]
+    print(f"{len(character_details)} of {df_all.shape[0]} character pages changed.")
+    if upsert_character_details(character_details, data_path) is not None:
+        for url in parsed:
+            cache.commit(url)
+        cache.save()
@@ -0,0 +1,206 @@
+import random
+import threading
+import time
+import queue
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import cloudscraper
+import requests
+
+from http_cache import Page
+
+
+def create_scraper():
+    """Default session factory: a Cloudflare-aware scraper posing as desktop Chrome."""
+    return cloudscraper.create_scraper(
+        browser={'browser': 'chrome', 'platform': 'windows', 'desktop': True}
+    )
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Allows `rate` acquisitions per second on average,
+    with bursts of up to `capacity` back-to-back acquisitions.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then consumes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SessionPool:
+    """
+    A fixed-size pool of reusable HTTP sessions. Sessions are created lazily on
+    first checkout and kept alive, so the TLS/Cloudflare handshake is paid once
+    per session instead of once per request.
+    """
+
+    def __init__(self, size, session_factory=create_scraper):
+        self.size = size
+        self.session_factory = session_factory
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    return self.session_factory()
+                except Exception:
+                    # Give the slot back, or the pool shrinks until checkouts block forever
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue  # a failed creation may have freed a slot meanwhile
+
+    @contextmanager
+    def session(self):
+        session = self._checkout()
+        try:
+            yield session
+        finally:
+            self._idle.put(session)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class Crawler:
+    """
+    Concurrent, polite page fetcher.
+
+    Requests are spread over a bounded worker pool sharing a `SessionPool`. Every
+    attempt (including retries) first takes a token from a global `TokenBucket`
+    and a slot from a per-host semaphore, so throughput is set by `rate` and
+    `per_host_limit` rather than by serial latency. Responses with a retryable
+    status (429/5xx) or a connection error are retried with jittered exponential
+    backoff, honouring `Retry-After` when the server sends one.
+
+    With an `HttpCache`, requests are conditional and unchanged pages come
+    back with `changed=False` so callers can skip re-parsing them.
+
+    `session_factory` can be swapped for `requests.Session` to crawl a local
+    HTTP stand-in serving saved HTML (see `local_server.py`).
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_workers=8, rate=1.0, burst=1, per_host_limit=4,
+                 max_retries=4, backoff_base=1.0, backoff_cap=30.0, timeout=30,
+                 session_factory=create_scraper, cache=None):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.cache = cache
+        self.bucket = TokenBucket(rate, burst)
+        self.sessions = SessionPool(max_workers, session_factory)
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_cap, float(retry_after))
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** attempt))
+        # Full jitter keeps retrying workers from hitting the host in lockstep
+        return random.uniform(0, delay)
+
+    def fetch(self, url, headers=None):
+        """
+        Fetches a single URL, retrying transient failures.
+        Returns the final response (which may still be an error status), or None
+        if every attempt failed with a connection error.
+        """
+        slots = self._host_semaphore(url)
+        response = None
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                with slots, self.sessions.session() as session:
+                    response = session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                print(f"Request error for {url} (attempt {attempt + 1}): {e}")
+                response = None
+            else:
+                if response.status_code not in self.RETRY_STATUSES:
+                    return response
+
+            if attempt < self.max_retries:
+                time.sleep(self._backoff(attempt, response))
+        return response
+
+    def fetch_page(self, url):
+        """Fetches `url` as a `Page`, going through the cache when there is one."""
+        if self.cache is not None:
+            return self.cache.fetch(self.fetch, url)
+        response = self.fetch(url)
+        if response is None:
+            return Page(url, None, None, False)
+        return Page(url, response.status_code, response.text, True)
+
+    def crawl(self, urls, handler):
+        """
+        Fetches every URL on the worker pool and calls `handler(url, page)`
+        on the worker thread for each one, where `page` is a `Page`.
+        Yields `(url, result)` pairs in completion order; handler exceptions are
+        reported and yield a None result instead of aborting the crawl.
+        """
+        def work(url):
+            return handler(url, self.fetch_page(url))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(work, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    yield url, future.result()
+                except Exception as e:
+                    print(f"Error handling {url}: {e}")
+                    yield url, None
+
+    def close(self):
+        self.sessions.close()
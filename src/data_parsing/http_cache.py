@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+# What a cache-aware fetch hands back: `changed` is False when the server
+# answered 304 or sent a body identical to the cached copy.
+Page = namedtuple('Page', ['url', 'status_code', 'text', 'changed'])
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class HttpCache:
+    """
+    On-disk HTTP response cache keyed by URL.
+
+    Bodies live in `<cache_dir>/<sha256(url)>.html`; `index.json` holds the
+    ETag, Last-Modified and content hash for each URL so that re-crawls can send
+    conditional requests and tell unchanged pages apart from updated ones.
+
+    A changed page is only staged when fetched: call `commit(url)` once its
+    data has been parsed and stored, then `save()` to persist the index. Pages
+    never committed (failed parse or write, interrupted crawl) are fetched and
+    reported as changed again next time.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._index = {}
+        self._pending = {}  # url -> (index entry, body) of changed pages awaiting commit()
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self._index = json.load(f)
+
+    def body_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + ".html")
+
+    def conditional_headers(self, url):
+        """Returns If-None-Match / If-Modified-Since headers for a cached URL."""
+        with self._lock:
+            entry = self._index.get(url)
+        if not entry or not os.path.exists(self.body_path(url)):
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def body(self, url):
+        with open(self.body_path(url), encoding='utf-8') as f:
+            return f.read()
+
+    def store(self, url, response):
+        """
+        Records a 200 response. Returns True if the body differs from the
+        cached copy (or there was none); such a body is staged until
+        `commit(url)`, and the cached copy is left as it was.
+        """
+        text = response.text
+        entry = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': content_hash(text),
+            'fetched_at': time.time(),
+        }
+        with self._lock:
+            changed = entry['content_hash'] != self._index.get(url, {}).get('content_hash')
+            if changed:
+                self._pending[url] = (entry, text)
+            else:
+                self._index[url] = entry
+        return changed
+
+    def commit(self, url):
+        """Accepts the staged body of `url` once its data has been stored."""
+        with self._lock:
+            staged = self._pending.pop(url, None)
+        if staged is None:
+            return
+        entry, text = staged
+        with open(self.body_path(url), 'w', encoding='utf-8') as f:
+            f.write(text)
+        with self._lock:
+            self._index[url] = entry
+
+    def fetch(self, fetch_fn, url):
+        """
+        Conditionally fetches `url` through `fetch_fn(url, headers)` and returns
+        a `Page`. A 304 is served from the cached body with `changed=False`.
+        """
+        response = fetch_fn(url, self.conditional_headers(url))
+        if response is None:
+            return Page(url, None, None, False)
+        if response.status_code == 304:
+            return Page(url, 200, self.body(url), False)
+        if response.status_code != 200:
+            return Page(url, response.status_code, None, False)
+        changed = self.store(url, response)
+        return Page(url, 200, response.text, changed)
+
+    def save(self):
+        """Persists the index of committed pages."""
+        with self._lock:
+            snapshot = dict(self._index)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.index_path)
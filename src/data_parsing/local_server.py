@@ -0,0 +1,23 @@
+import functools
+import threading
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_saved_pages(directory, port=0):
+    """
+    Serves a directory of saved HTML on localhost as a stand-in for swgoh.gg.
+
+    Pages are expected in mirror layout, e.g. `units/jedi-master-mace-windu/index.html`
+    answers `/units/jedi-master-mace-windu/`. Runs on a daemon thread; returns
+    `(server, base_url)` and the caller is responsible for `server.shutdown()`.
+    """
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,97 @@
+"""
+Re-extracts the parquet files from archived HTML, without touching the network.
+
+    python offline_parse.py ../../data/http_cache
+    python offline_parse.py ~/swgoh_mirror --workers 8 --chunk-size 16
+
+The snapshot directory is either an `HttpCache` directory (bodies indexed by
+`index.json`) or a mirror of the site, e.g. `units/<slug>/index.html` and
+`characters/index.html`. Unit pages are parsed across a process pool, one
+worker per core by default, and streamed into `character_details.parquet`
+and `character_abilities.parquet` in row groups as chunks complete.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from character_fetcher import CHARACTERS_URL, parse_characters_page
+from character_page import parse_character_page
+from parquet_utils import save_character_details, save_to_parquet
+
+SITE_ROOT = "https://swgoh.gg/"
+
+
+def iter_snapshots(directory):
+    """Yields `(url, path)` for every saved page in `directory`."""
+    index_path = os.path.join(directory, "index.json")
+    if os.path.exists(index_path):
+        # HttpCache layout; import here so plain mirrors don't need it
+        from http_cache import HttpCache
+        cache = HttpCache(directory)
+        with open(index_path) as f:
+            for url in json.load(f):
+                path = cache.body_path(url)
+                if os.path.exists(path):
+                    yield url, path
+        return
+
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(".html"):
+                continue
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, directory)
+            rel = rel[:-len("index.html")] if name == "index.html" else rel[:-len(".html")] + "/"
+            yield SITE_ROOT + rel.replace(os.sep, "/"), path
+
+
+def parse_chunk(chunk):
+    """Worker entry point: parses a list of `(url, path)` unit snapshots."""
+    results = []
+    for url, path in chunk:
+        with open(path, encoding='utf-8') as f:
+            data = parse_character_page(f.read(), url)
+        if data:
+            results.append(data)
+    return results
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def reparse_units(snapshots, workers=None, chunk_size=16):
+    """
+    Parses unit snapshots on a process pool, yielding detail dictionaries in
+    snapshot order as each chunk completes.
+    """
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        # map() keeps chunk order while still running chunks concurrently
+        for results in executor.map(parse_chunk, _chunks(snapshots, chunk_size)):
+            yield from results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("directory", help="Snapshot directory (HttpCache or site mirror)")
+    arg_parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "../../data"),
+                            help="Directory to write the parquet files to")
+    arg_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    arg_parser.add_argument("--chunk-size", type=int, default=16, help="Pages per work unit")
+    arg_parser.add_argument("--row-group-size", type=int, default=64, help="Rows per parquet row group")
+    args = arg_parser.parse_args()
+    os.makedirs(args.output, exist_ok=True)
+
+    snapshots = sorted(iter_snapshots(args.directory))
+    unit_pages = [(url, path) for url, path in snapshots if "/units/" in url]
+
+    characters_page = dict(snapshots).get(CHARACTERS_URL)
+    if characters_page:
+        with open(characters_page, encoding='utf-8') as f:
+            save_to_parquet(parse_characters_page(f.read()), os.path.join(args.output, "swgoh_units.parquet"))
+
+    print(f"Re-parsing {len(unit_pages)} unit pages...")
+    save_character_details(reparse_units(unit_pages, args.workers, args.chunk_size), args.output,
+                           row_group_size=args.row_group_size)
@@ -1,20 +1,231 @@
-import pandas as pd
+import json
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from schema import (ABILITIES_FILE, ABILITIES_SCHEMA, DETAILS_FILE, DETAILS_SCHEMA,
+                    ability_rows, details_row)
 
-def save_to_parquet(character_data, filename="swgoh_characters.parquet"):
+def save_to_parquet(character_data, filename="swgoh_characters.parquet", row_group_size=1024, schema=None):
     """
     Takes the list of dictionaries from get_swgoh_characters 
     and saves it to a Parquet file.
+
+    `character_data` may also be any iterable of dictionaries (e.g. a generator
+    fed by worker processes); with a `schema` it is written through a
+    ParquetWriter one row group at a time, so the full dataset never has to be
+    held in memory. Without one, the rows are collected first and the schema
+    is inferred from all of them, so a column that is null in early rows still
+    gets its type. The file is written to a temporary path and only replaces
+    `filename` once complete, so a failure leaves the old file intact.
     """
-    if not character_data:
+    if schema is None:
+        character_data = list(character_data)
+        if character_data:
+            schema = pa.Table.from_pylist(character_data).schema
+    tmp_path = filename + ".tmp"
+    writer = None
+    count = 0
+    try:
+        for batch in _batched(character_data, row_group_size):
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, schema)
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+        if writer is not None:
+            writer.close()
+            os.replace(tmp_path, filename)
+    except Exception as e:
+        print(f"Failed to save parquet: {e}")
+        _discard(writer, tmp_path)
+        return 0
+
+    if count == 0:
         print("No data provided to save.")
-        return
+    else:
+        print(f"Successfully saved {count} characters to {filename}")
+    return count
+
+
+def _discard(writer, tmp_path):
+    """Closes a failed writer and removes its partial file."""
+    if writer is not None:
+        try:
+            writer.close()
+        except Exception:
+            pass
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def upsert_parquet(rows, filename, key="character_url", schema=None):
+    """
+    Inserts or replaces `rows` (a list of dictionaries) in an existing Parquet
+    file, matching on `key`. Rows that are identical to what is already stored
+    are left alone, and the file is only rewritten if something changed.
+    With a `schema`, rows are converted to it and the file is written with it.
+    Returns the number of rows inserted or updated, or None if the file could
+    not be read or written.
+    """
+    if not rows:
+        return 0
+    if not os.path.exists(filename):
+        return len(rows) if save_to_parquet(rows, filename, schema=schema) else None
+
+    existing_rows, schema = _read_rows(filename, schema)
+    if existing_rows is None:
+        return None
+
+    # Normalise the incoming rows through the file's schema so that lists,
+    # structs and missing keys compare equal regardless of where they came from
+    incoming = {r[key]: r for r in pa.Table.from_pylist(rows, schema=schema).to_pylist()}
+    existing = {r[key]: r for r in existing_rows}
+
+    changed = [r for k, r in incoming.items() if k not in existing or _canonical(existing[k]) != _canonical(r)]
+    if not changed:
+        print(f"No changes to {filename}")
+        return 0
+
+    new_keys = [r[key] for r in changed if r[key] not in existing]
+    existing.update({r[key]: r for r in changed})
+    # Keep the file's existing order and append new keys at the end
+    order = [r[key] for r in existing_rows] + new_keys
+    if not save_to_parquet([existing[k] for k in order], filename, schema=schema):
+        return None
+    print(f"Upserted {len(changed)} rows into {filename}")
+    return len(changed)
+
+
+def upsert_parquet_groups(rows, filename, keys, key="character_url", schema=None):
+    """
+    Like `upsert_parquet`, for files holding several rows per key (e.g. one row
+    per ability). Every key in `keys` has its whole group of rows replaced by
+    the matching `rows`, which may be none. Groups are compared as a whole, so
+    the file is only rewritten if at least one of them changed.
+    Returns the number of keys whose rows were inserted or updated, or None if
+    the file could not be read or written.
+    """
+    if not keys:
+        return 0
+    if not os.path.exists(filename):
+        if rows and not save_to_parquet(rows, filename, schema=schema):
+            return None
+        return len(set(keys))
+
+    existing_rows, schema = _read_rows(filename, schema)
+    if existing_rows is None:
+        return None
 
-    # Convert the list of dictionaries into a DataFrame
-    df = pd.DataFrame(character_data)
+    existing = _group_by(existing_rows, key)
+    incoming = {k: [] for k in keys}
+    incoming.update(_group_by(pa.Table.from_pylist(rows, schema=schema).to_pylist(), key))
 
+    changed = {k for k, group in incoming.items()
+               if _canonical(existing.get(k, [])) != _canonical(group)}
+    if not changed:
+        print(f"No changes to {filename}")
+        return 0
+
+    # Replaced groups keep their place; new keys are appended at the end
+    existing.update({k: group for k, group in incoming.items() if k in changed})
+    if not save_to_parquet([r for group in existing.values() for r in group], filename, schema=schema):
+        return None
+    print(f"Upserted {len(changed)} groups into {filename}")
+    return len(changed)
+
+
+def save_character_details(details, data_path, row_group_size=1024):
+    """
+    Writes parsed character pages (any iterable of `parse_character_page`
+    dictionaries) to `character_details.parquet` and the normalized
+    `character_abilities.parquet` in `data_path`, one row group at a time.
+    Both files are written to temporary paths and replace the old ones only
+    once both are complete, so a failure leaves the pair untouched.
+    Returns the number of characters written.
+    """
+    details_path = os.path.join(data_path, DETAILS_FILE)
+    abilities_path = os.path.join(data_path, ABILITIES_FILE)
+    details_writer = abilities_writer = None
+    count = 0
     try:
-        # Save to parquet using the pyarrow engine
-        df.to_parquet(filename, engine='pyarrow', index=False)
-        print(f"Successfully saved {len(df)} characters to {filename}")
+        details_writer = pq.ParquetWriter(details_path + ".tmp", DETAILS_SCHEMA)
+        abilities_writer = pq.ParquetWriter(abilities_path + ".tmp", ABILITIES_SCHEMA)
+        for batch in _batched(details, row_group_size):
+            details_writer.write_table(pa.Table.from_pylist([details_row(c) for c in batch], schema=DETAILS_SCHEMA))
+            abilities_writer.write_table(pa.Table.from_pylist([a for c in batch for a in ability_rows(c)],
+                                                              schema=ABILITIES_SCHEMA))
+            count += len(batch)
+        details_writer.close()
+        abilities_writer.close()
     except Exception as e:
-        print(f"Failed to save parquet: {e}")
\ No newline at end of file
+        print(f"Failed to save character details: {e}")
+        _discard(details_writer, details_path + ".tmp")
+        _discard(abilities_writer, abilities_path + ".tmp")
+        return 0
+
+    os.replace(details_path + ".tmp", details_path)
+    os.replace(abilities_path + ".tmp", abilities_path)
+    print(f"Successfully saved {count} characters to {details_path} and {abilities_path}")
+    return count
+
+
+def upsert_character_details(details, data_path):
+    """
+    Upserts parsed character pages into `character_details.parquet` and
+    `character_abilities.parquet` in `data_path`. A character's abilities are
+    replaced as a group. Returns `(details_updated, abilities_updated)`, the
+    number of characters that changed in each file, or None if either file
+    could not be read or written.
+    """
+    details = list(details)
+    urls = [c['character_url'] for c in details]
+    updated = upsert_parquet([details_row(c) for c in details], os.path.join(data_path, DETAILS_FILE),
+                             schema=DETAILS_SCHEMA)
+    abilities_updated = upsert_parquet_groups([a for c in details for a in ability_rows(c)],
+                                              os.path.join(data_path, ABILITIES_FILE), urls,
+                                              schema=ABILITIES_SCHEMA)
+    if updated is None or abilities_updated is None:
+        return None
+    return updated, abilities_updated
+
+
+def _read_rows(filename, schema):
+    """
+    Reads a Parquet file as a list of dictionaries. Returns `(rows, schema)`,
+    or `(None, schema)` if the file was written with a different schema.
+    """
+    table = pq.read_table(filename)
+    if schema is None:
+        # Drop pandas metadata; it records a row count that will go stale
+        return table.to_pylist(), table.schema.remove_metadata()
+    if not table.schema.equals(schema):
+        print(f"{filename} was written with an older schema; rebuild it with offline_parse.py")
+        return None, schema
+    return table.to_pylist(), schema
+
+
+def _group_by(rows, key):
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[key], []).append(row)
+    return groups
+
+
+def _canonical(record):
+    return json.dumps(record, sort_keys=True, default=_to_builtin)
+
+
+def _to_builtin(value):
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
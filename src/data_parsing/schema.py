@@ -0,0 +1,92 @@
+import re
+import pyarrow as pa
+
+DETAILS_FILE = "character_details.parquet"
+ABILITIES_FILE = "character_abilities.parquet"
+
+# Stat labels as they appear in the unit page's stat table. Each becomes a
+# float64 field of the `base_stats` struct, which parquet stores as its own
+# column. Labels not listed here are dropped.
+STAT_LABELS = [
+    'Power', 'Strength', 'Agility', 'Tactics',
+    'Health', 'Protection', 'Speed', 'Critical Damage', 'Potency', 'Tenacity',
+    'Health Steal', 'Defense Penetration',
+    'Physical Damage', 'Physical Critical Chance', 'Armor Penetration', 'Physical Accuracy',
+    'Special Damage', 'Special Critical Chance', 'Resistance Penetration', 'Special Accuracy',
+    'Armor', 'Resistance', 'Dodge Chance', 'Deflection Chance',
+    'Physical Critical Avoidance', 'Special Critical Avoidance',
+]
+
+
+def stat_field(label):
+    """'Physical Critical Chance' -> 'physical_critical_chance'"""
+    return re.sub(r'[^a-z0-9]+', '_', label.lower()).strip('_')
+
+
+STAT_FIELDS = {label: stat_field(label) for label in STAT_LABELS}
+
+# Ability types and classes are a small closed vocabulary, so they are stored
+# as dictionary-encoded strings rather than repeated per row.
+DETAILS_SCHEMA = pa.schema([
+    ('character_url', pa.string()),
+    ('base_stats', pa.struct([(field, pa.float64()) for field in STAT_FIELDS.values()])),
+    ('ability_classes', pa.list_(pa.dictionary(pa.int16(), pa.string()))),
+    ('mods_data_url', pa.string()),
+    ('player_data_url', pa.string()),
+])
+
+# One row per ability, keyed by unit; `ability_index` keeps page order.
+ABILITIES_SCHEMA = pa.schema([
+    ('character_url', pa.string()),
+    ('ability_index', pa.int16()),
+    ('ability_name', pa.string()),
+    ('ability_type', pa.dictionary(pa.int8(), pa.string())),
+    ('description', pa.string()),
+    ('breakdown_link', pa.string()),
+    ('is_zeta', pa.bool_()),
+    ('is_omicron', pa.bool_()),
+    ('is_ultimate', pa.bool_()),
+])
+
+
+def parse_stat_value(text):
+    """
+    Converts a displayed stat ("12,345", "47.5%") to a float. Percentages keep
+    their percent value, so "47.5%" becomes 47.5. Returns None if unparseable.
+    """
+    if text is None:
+        return None
+    try:
+        return float(str(text).replace(',', '').replace('%', '').strip())
+    except ValueError:
+        return None
+
+
+def details_row(character):
+    """Flattens a `parse_character_page` dictionary into a DETAILS_SCHEMA row."""
+    stats = character.get('base_stats') or {}
+    return {
+        'character_url': character['character_url'],
+        'base_stats': {field: parse_stat_value(stats.get(label)) for label, field in STAT_FIELDS.items()},
+        'ability_classes': list(character.get('ability_classes') or []),
+        'mods_data_url': character.get('mods_data_url'),
+        'player_data_url': character.get('player_data_url'),
+    }
+
+
+def ability_rows(character):
+    """Splits the abilities of a `parse_character_page` dictionary into ABILITIES_SCHEMA rows."""
+    return [
+        {
+            'character_url': character['character_url'],
+            'ability_index': i,
+            'ability_name': ability['ability_name'],
+            'ability_type': ability.get('ability_type'),
+            'description': ability.get('description'),
+            'breakdown_link': ability.get('breakdown_link'),
+            'is_zeta': bool(ability.get('is_zeta')),
+            'is_omicron': bool(ability.get('is_omicron')),
+            'is_ultimate': bool(ability.get('is_ultimate')),
+        }
+        for i, ability in enumerate(character.get('abilities') or [])
+    ]
@@ -0,0 +1,62 @@
+from langgraph.graph import StateGraph, START
+from langgraph.prebuilt import ToolNode, tools_condition
+from langchain_core.messages import AIMessage, AIMessageChunk
+from chatbot import State, make_chatbot
+
+
+def build_agent(llm_with_tools, tools, checkpointer=None):
+    """
+    Compiles the chatbot <-> tools graph around `llm_with_tools`.
+    With a `checkpointer`, conversations persist per `thread_id` in the run config.
+    """
+    builder = StateGraph(State)
+
+    # Add our nodes: the chatbot and the prebuilt ToolNode
+    builder.add_node("chatbot", make_chatbot(llm_with_tools))
+    builder.add_edge(START, "chatbot")
+    if tools:
+        builder.add_node("tools", ToolNode(tools))
+        # Conditional Edge: After the chatbot runs, should we call tools or end?
+        builder.add_conditional_edges(
+            "chatbot",
+            tools_condition, # This checks if the LLM generated a tool call
+        )
+        # After tools run, always go back to the chatbot to process the results
+        builder.add_edge("tools", "chatbot")
+
+    return builder.compile(checkpointer=checkpointer)
+
+
+def message_text(message):
+    """Text of a message or chunk, whether its content is a string or a list of parts."""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return "".join(part.get('text', '') if isinstance(part, dict) else str(part) for part in content)
+
+
+async def stream_tokens(agent, user_input, thread_id=None, callbacks=None):
+    """
+    Runs one turn of `agent` and yields the chatbot's answer text as it is
+    generated, token by token. Pass a `thread_id` to continue a checkpointed
+    conversation, and `callbacks` (e.g. a `TelemetryCallback`) to trace the run.
+    A model that doesn't stream yields its final answer in one piece.
+    """
+    config = {"callbacks": callbacks or []}
+    if thread_id is not None:
+        config["configurable"] = {"thread_id": thread_id}
+    inputs = {"messages": [("user", user_input)]}
+    streamed, final = False, ""
+    async for chunk, metadata in agent.astream(inputs, config, stream_mode="messages"):
+        if metadata.get("langgraph_node") != "chatbot":
+            continue
+        if isinstance(chunk, AIMessageChunk):
+            text = message_text(chunk)
+            if text:
+                streamed = True
+                yield text
+        elif isinstance(chunk, AIMessage):
+            # Non-streaming models only report whole messages; the last one is the answer
+            final = message_text(chunk)
+    if not streamed and final:
+        yield final
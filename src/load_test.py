@@ -0,0 +1,94 @@
+"""
+Load-tests `server.py` against a fake chat model, without network or API keys.
+
+    python load_test.py --sessions 200 --turns 3 --token-delay 0.01
+
+Starts an `AgentServer` in-process, opens one TCP connection per session and
+sends `--turns` messages on each. Reports time to first token and full-turn
+latency percentiles, overall throughput, and checks that every session's
+checkpoint holds exactly its own turns. With `--trace`, spans are written as
+in the real server, for `python telemetry.py`.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langgraph.checkpoint.memory import InMemorySaver
+
+from graph import build_agent
+from server import AgentServer
+from telemetry import TelemetryCallback, start_tracing
+
+ANSWER = "Roger roger. Lead with Mace Windu, add Jedi support and a healer."
+
+
+async def run_session(port, session_id, turns):
+    """Runs one session's turns; returns a list of (time_to_first_token, turn_latency)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    timings = []
+    try:
+        for turn in range(turns):
+            start = time.perf_counter()
+            first_token = None
+            writer.write(json.dumps({"session_id": session_id, "message": f"question {turn}"}).encode() + b"\n")
+            await writer.drain()
+            while True:
+                reply = json.loads(await reader.readline())
+                if "token" in reply and first_token is None:
+                    first_token = time.perf_counter() - start
+                if reply.get("done") or "error" in reply:
+                    break
+            timings.append((first_token, time.perf_counter() - start))
+    finally:
+        writer.close()
+    return timings
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def main(sessions, turns, token_delay, trace_path=None):
+    llm = FakeListChatModel(responses=[ANSWER], sleep=token_delay)
+    agent = build_agent(llm, tools=[], checkpointer=InMemorySaver())
+    callbacks = None
+    if trace_path:
+        start_tracing(trace_path)
+        callbacks = [TelemetryCallback()]
+    server = await AgentServer(agent, max_concurrent_turns=sessions, callbacks=callbacks).start(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    start = time.perf_counter()
+    async with server:
+        results = await asyncio.gather(*(run_session(port, f"session-{i}", turns) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    timings = [t for session in results for t in session]
+    ttft = [t[0] for t in timings if t[0] is not None]
+    latency = [t[1] for t in timings]
+    print(f"{sessions} sessions x {turns} turns, {len(ANSWER)} tokens per answer, {token_delay * 1000:.0f} ms/token")
+    print(f"  time to first token: p50 {statistics.median(ttft) * 1000:7.1f} ms | p95 {percentile(ttft, 95) * 1000:7.1f} ms")
+    print(f"  turn latency:        p50 {statistics.median(latency) * 1000:7.1f} ms | p95 {percentile(latency, 95) * 1000:7.1f} ms")
+    print(f"  throughput:          {len(timings) / elapsed:7.1f} turns/s over {elapsed:.2f} s")
+
+    # Each session's checkpoint should hold its own question/answer pairs only
+    wrong = 0
+    for i in range(sessions):
+        state = await agent.aget_state({"configurable": {"thread_id": f"session-{i}"}})
+        if len(state.values["messages"]) != 2 * turns:
+            wrong += 1
+    print(f"  checkpoints:         {sessions - wrong}/{sessions} sessions intact")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sessions", type=int, default=100, help="Concurrent sessions")
+    arg_parser.add_argument("--turns", type=int, default=3, help="Messages per session")
+    arg_parser.add_argument("--token-delay", type=float, default=0.005, help="Fake model delay per streamed token (s)")
+    arg_parser.add_argument("--trace", help="Write telemetry spans to this JSONL file")
+    args = arg_parser.parse_args()
+    asyncio.run(main(args.sessions, args.turns, args.token_delay, args.trace))
@@ -0,0 +1,112 @@
+"""
+Async chat server: many concurrent sessions over one compiled agent.
+
+    python server.py --port 8765
+
+Speaks newline-delimited JSON over TCP. A client sends one request per line,
+
+    {"session_id": "abc", "message": "Who should lead a Jedi team?"}
+
+and receives the answer as a stream of `{"session_id": ..., "token": ...}`
+lines followed by `{"session_id": ..., "done": true}` (or `"error"`).
+Conversation history is checkpointed per `session_id`, so later messages in
+the same session continue the conversation; omit it to start a new one.
+Opening questions that were answered before (or near-duplicates of them) are
+served from the answer cache without calling the model.
+"""
+import argparse
+import asyncio
+import json
+import uuid
+import weakref
+
+from answer_cache import cached_stream_tokens
+
+
+class AgentServer:
+    """
+    Serves `agent` (compiled with a checkpointer) to concurrent sessions.
+    Turns of the same session run one at a time, in arrival order; at most
+    `max_concurrent_turns` turns run across all sessions. With an
+    `answer_cache`, cached opening questions skip the agent. `callbacks` are
+    passed to every run, e.g. a `TelemetryCallback`.
+    """
+
+    def __init__(self, agent, max_concurrent_turns=64, answer_cache=None, callbacks=None):
+        self.agent = agent
+        self.answer_cache = answer_cache
+        self.callbacks = callbacks
+        self._turns = asyncio.Semaphore(max_concurrent_turns)
+        # Locks only live while a turn holds or waits on them, so idle sessions cost nothing
+        self._session_locks = weakref.WeakValueDictionary()
+
+    async def answer(self, session_id, message):
+        """Yields the answer to `message` in session `session_id`, token by token."""
+        lock = self._session_locks.get(session_id)
+        if lock is None:
+            lock = self._session_locks[session_id] = asyncio.Lock()
+        async with lock, self._turns:
+            tokens = cached_stream_tokens(self.agent, self.answer_cache, message, session_id, self.callbacks)
+            async for token in tokens:
+                yield token
+
+    async def handle_connection(self, reader, writer):
+        async def send(payload):
+            writer.write(json.dumps(payload).encode('utf-8') + b"\n")
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    message = request["message"]
+                except (ValueError, KeyError, TypeError):
+                    await send({"error": "expected a JSON object with a 'message'"})
+                    continue
+                session_id = request.get("session_id") or str(uuid.uuid4())
+                try:
+                    async for token in self.answer(session_id, message):
+                        await send({"session_id": session_id, "token": token})
+                    await send({"session_id": session_id, "done": True})
+                except Exception as e:
+                    print(f"Error in session {session_id}: {e}")
+                    await send({"session_id": session_id, "error": str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Starts listening; returns the `asyncio.Server` (port 0 picks a free port)."""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def main(host, port, max_concurrent_turns, trace_path):
+    from langgraph.checkpoint.memory import InMemorySaver
+    from agent_tools.registry import registry
+    from answer_cache import default_answer_cache
+    from graph import build_agent
+    from model import llm_with_tools, tools
+    from telemetry import TelemetryCallback, start_tracing
+
+    start_tracing(trace_path)
+    registry.warm_up()
+    agent = build_agent(llm_with_tools, tools, checkpointer=InMemorySaver())
+    answer_cache = default_answer_cache()
+    server = await AgentServer(agent, max_concurrent_turns, answer_cache, [TelemetryCallback()]).start(host, port)
+    print(f"Serving on {', '.join(str(s.getsockname()) for s in server.sockets)}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        answer_cache.save()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--max-concurrent-turns", type=int, default=64, help="Turns running at once")
+    arg_parser.add_argument("--trace", default="agent_trace.jsonl", help="JSONL file for latency/token spans")
+    args = arg_parser.parse_args()
+    asyncio.run(main(args.host, args.port, args.max_concurrent_turns, args.trace))
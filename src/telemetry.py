@@ -0,0 +1,223 @@
+"""
+Structured tracing for the agent, and a report over the traces it writes.
+
+    python telemetry.py agent_trace.jsonl
+
+Spans for graph nodes, model calls and tool calls (wall time, token usage,
+time to first token) and cache hit/miss events are written one JSON object
+per line. Records go through a `QueueHandler`, so the streaming loop only
+enqueues them; a background listener thread does the file I/O.
+
+The report prints count, p50, p95 and max latency per node, model and tool,
+average token usage and time to first token per model, hit rates per cache
+and how much context compaction saved.
+"""
+import argparse
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import statistics
+import time
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent_tools.trace import emit, trace_logger
+
+
+class JsonlFormatter(logging.Formatter):
+    """Formats a record's `trace` fields (or its message) as one JSON line, stamped with the record's time."""
+
+    def format(self, record):
+        fields = getattr(record, "trace", None) or {"message": record.getMessage()}
+        return json.dumps({"ts": round(record.created, 3), **fields}, default=str)
+
+
+_listener = None
+
+
+def start_tracing(path="agent_trace.jsonl"):
+    """
+    Starts writing trace records to `path` (appending) from a background
+    thread, until `stop_tracing()` or exit.
+    """
+    global _listener
+    stop_tracing()
+    file_handler = logging.FileHandler(path, mode='a', encoding='utf-8')
+    file_handler.setFormatter(JsonlFormatter())
+    records = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(records, file_handler)
+    trace_logger.addHandler(logging.handlers.QueueHandler(records))
+    trace_logger.setLevel(logging.INFO)
+    _listener.start()
+
+
+def stop_tracing():
+    """Writes out any queued records and stops tracing."""
+    global _listener
+    if _listener is None:
+        return
+    for handler in list(trace_logger.handlers):
+        trace_logger.removeHandler(handler)
+    trace_logger.setLevel(logging.NOTSET)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(stop_tracing)
+
+
+def _token_usage(response):
+    """`(input_tokens, output_tokens)` of an `LLMResult`, or Nones if the model didn't report them."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens"), usage.get("output_tokens")
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+
+class TelemetryCallback(BaseCallbackHandler):
+    """
+    LangChain callback that turns graph node, chat model and tool runs into
+    spans. Pass it in the run config: `{"callbacks": [TelemetryCallback()]}`.
+    The handlers only do bookkeeping and enqueue a record, so they run inline
+    on the event loop.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._open = {}  # run_id -> span fields, with "start" as perf_counter()
+
+    def _start(self, run_id, kind, name, metadata, **fields):
+        session = (metadata or {}).get("thread_id")
+        self._open[run_id] = {"kind": kind, "name": name, "session": session, "start": time.perf_counter(), **fields}
+
+    def _end(self, run_id, **fields):
+        span = self._open.pop(run_id, None)
+        if span is None:
+            return
+        start = span.pop("start")
+        first_token = span.pop("first_token", None)
+        if first_token is not None:
+            span["ttft_ms"] = round((first_token - start) * 1000, 2)
+        emit(span.pop("kind"), span.pop("name"), ms=round((time.perf_counter() - start) * 1000, 2), **span, **fields)
+
+    # Graph nodes are chain runs named after the node
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node, metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=repr(error))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or kwargs.get("name") or "chat_model"
+        self._start(run_id, "llm", model, metadata)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._open.get(run_id)
+        if span is not None and "first_token" not in span:
+            span["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens, output_tokens = _token_usage(response)
+        self._end(run_id, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=repr(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, "tool", name, metadata, input=input_str[:200])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, "content", output)
+        self._end(run_id, output_chars=len(content) if isinstance(content, str) else None)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=repr(error))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def summarize(records):
+    """Prints the latency, token, cache and context report for an iterable of trace records."""
+    latencies = defaultdict(list)
+    tokens = defaultdict(lambda: [0, 0, 0])  # calls reporting usage, input, output
+    caches = defaultdict(lambda: [0, 0])  # hits, lookups
+    first_tokens = defaultdict(list)
+    compactions = []  # (tokens before, tokens after)
+    for record in records:
+        kind, name = record.get("kind"), record.get("name")
+        if kind == "cache":
+            caches[name][0] += bool(record.get("hit"))
+            caches[name][1] += 1
+        elif kind == "context":
+            compactions.append((record.get("before") or 0, record.get("after") or 0))
+        elif "ms" in record:
+            latencies[(kind, name)].append(record["ms"])
+            if record.get("ttft_ms") is not None:
+                first_tokens[name].append(record["ttft_ms"])
+            if kind == "llm" and record.get("output_tokens") is not None:
+                usage = tokens[name]
+                usage[0] += 1
+                usage[1] += record.get("input_tokens") or 0
+                usage[2] += record["output_tokens"]
+
+    if not latencies and not caches and not compactions:
+        print("No trace records")
+        return
+    print(f"{'kind':6} {'name':34} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for (kind, name), values in sorted(latencies.items()):
+        print(f"{kind:6} {name[:34]:34} {len(values):6d} {statistics.median(values):9.1f} "
+              f"{percentile(values, 95):9.1f} {max(values):9.1f}")
+    if tokens:
+        print("\nTokens per model call (average)")
+        for name, (calls, input_tokens, output_tokens) in sorted(tokens.items()):
+            print(f"  {name[:34]:34} in {input_tokens / calls:8.0f} | out {output_tokens / calls:6.0f}")
+    if first_tokens:
+        print("\nTime to first token (ms)")
+        for name, values in sorted(first_tokens.items()):
+            print(f"  {name[:34]:34} p50 {statistics.median(values):8.1f} | p95 {percentile(values, 95):8.1f}")
+    if caches:
+        print("\nCache hit rates")
+        for name, (hits, lookups) in sorted(caches.items()):
+            print(f"  {name[:34]:34} {hits}/{lookups} ({hits / lookups:.0%})")
+    if compactions:
+        before = sum(b for b, _ in compactions)
+        after = sum(a for _, a in compactions)
+        print(f"\nContext compaction (estimated tokens)\n  {len(compactions)} compactions | "
+              f"avg {before / len(compactions):.0f} -> {after / len(compactions):.0f} | "
+              f"saved {before - after} ({(before - after) / max(before, 1):.0%})")
+
+
+def read_trace(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"Skipping malformed line: {line[:80]}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("trace", nargs="?", default="agent_trace.jsonl", help="JSONL trace file")
+    args = arg_parser.parse_args()
+    summarize(read_trace(args.trace))